@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file benchmarks/run.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+"""
+Benchmarks of the interpolation tables.
+
+Measures the scalar call latency, the batch throughput, the construction time and the memory of
+`LinearInterpolation` and `BilinearInterpolation` tables of various sizes, with uniform and non
+uniform axes, in range and extrapolated queries and sorted and random query orders.
+
+Each timing is the best of several repeats that run for at least `MIN_SECONDS` each, and its
+noise is the distance of the median repeat from the best one.  The results are compared with the
+baselines and the measurements that are slower (or larger) than their baseline by more than the
+tolerance, or by more than `NOISE_FACTOR` times the noise of the current or the baseline timing if
+that is larger, are flagged as regressions, in which case the script exits with status 1.  Timings depend
+on the machine, so the baselines are not part of the repository: save them with `--save` on the
+machine that runs the comparisons.
+
+usage: python benchmarks/run.py [--sizes 10 1000 ...] [--save] [--tolerance 0.25]
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpolation import BilinearInterpolation, LinearInterpolation  # noqa: E402
+
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+SIZES = (10, 1000, 100000, 1000000, 10000000)
+SCALAR_QUERIES = 2000
+BATCH_QUERIES = 100000
+
+# every repeat of a timing runs for at least MIN_SECONDS
+MIN_SECONDS = 0.05
+REPEATS = 9
+
+# a timing is only flagged if it is slower than its baseline by NOISE_FACTOR times the noise
+# of either measurement
+NOISE_FACTOR = 3
+
+
+def axis(length, uniform, rng):
+    """ Return an ascending axis of `length` points, equally spaced or not.  """
+    if uniform:
+        return array("d", (float(k) for k in range(length)))
+    x = 0.0
+    points = array("d")
+    for k in range(length):
+        points.append(x)
+        x += rng.uniform(0.5, 1.5)
+    return points
+
+
+def queries(index, count, extrapolated, ordered, rng):
+    """ Return `count` query points in the range of `index` or up to a range width outside it.  """
+    lower, upper = index[0], index[-1]
+    if extrapolated:
+        width = upper - lower
+        points = [rng.choice((rng.uniform(lower - width, lower), rng.uniform(upper, upper + width)))
+                  for k in range(count)]
+    else:
+        points = [rng.uniform(lower, upper) for k in range(count)]
+    if ordered:
+        points.sort()
+    return array("d", points)
+
+
+def seconds(function):
+    """
+    Return the best time of a call of `function` and the noise of the measurement, i.e. the
+    relative distance of the median of the repeats from the best one.
+
+    """
+    timer = timeit.Timer(function)
+    elapsed = timer.timeit(number=1)
+    number = int(MIN_SECONDS / elapsed) + 1 if elapsed < MIN_SECONDS else 1
+    times = sorted(timer.repeat(repeat=REPEATS, number=number))
+    best = times[0]
+    return best / number, times[len(times) // 2] / best - 1
+
+
+def memory(function):
+    """ Return the number of bytes that remain allocated by the result of `function`.  """
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def linear_tables(size, rng):
+    for uniform in (True, False):
+        x_index = axis(size, uniform, rng)
+        values = array("d", (rng.random() for k in range(size)))
+
+        def build(x_index=x_index, values=values):
+            return LinearInterpolation(x_index, values)
+
+        yield "linear/%s/n=%d" % ("uniform" if uniform else "nonuniform", size), build, (x_index,)
+
+
+def bilinear_tables(size, rng):
+    side = max(int(round(size ** 0.5)), 2)
+    for uniform in (True, False):
+        x_index = axis(side, uniform, rng)
+        y_index = axis(side, uniform, rng)
+        values = [array("d", (rng.random() for i in range(side))) for j in range(side)]
+
+        def build(x_index=x_index, y_index=y_index, values=values):
+            return BilinearInterpolation(x_index, y_index, values)
+
+        name = "bilinear/%s/n=%d" % ("uniform" if uniform else "nonuniform", side * side)
+        yield name, build, (x_index, y_index)
+
+
+def measure(sizes):
+    """
+    Run the benchmarks and return a dict of measurements, in seconds or bytes, and a dict of the
+    noise of the timings.
+
+    """
+    rng = random.Random(42)
+    results = {}
+    noise = {}
+
+    def time(name, function, count=1):
+        results[name], noise[name] = seconds(function)
+        results[name] /= count
+
+    for size in sizes:
+        for tables in (linear_tables, bilinear_tables):
+            for name, build, indexes in tables(size, rng):
+                print(name, file=sys.stderr)
+                time(name + "/construction", build)
+                results[name + "/memory"] = memory(build)
+
+                table = build()
+                for extrapolated in (False, True):
+                    for ordered in (True, False):
+                        case = "%s/%s/%s" % (name,
+                                             "extrapolated" if extrapolated else "in-range",
+                                             "sorted" if ordered else "random")
+                        scalar = [queries(index, SCALAR_QUERIES, extrapolated, ordered, rng)
+                                  for index in indexes]
+                        batch = [queries(index, BATCH_QUERIES, extrapolated, ordered, rng)
+                                 for index in indexes]
+
+                        def calls(table=table, points=list(zip(*scalar))):
+                            for point in points:
+                                table(*point)
+
+                        def evaluate(table=table, batch=batch):
+                            table.evaluate(*batch)
+
+                        time(case + "/scalar", calls, SCALAR_QUERIES)
+                        time(case + "/batch", evaluate, BATCH_QUERIES)
+    return results, noise
+
+
+def compare(results, noise, baselines, tolerance):
+    """
+    Print the results next to their `baselines`, a dict of `results` and `noise` as saved by
+    `--save`, and return the names of the regressions.
+
+    """
+    regressions = []
+    for name in sorted(results):
+        value = results[name]
+        baseline = baselines["results"].get(name)
+        if baseline:
+            change = value / baseline - 1
+            floor = max(noise.get(name, 0), baselines["noise"].get(name, 0))
+            threshold = max(tolerance, NOISE_FACTOR * floor)
+            flag = "REGRESSION" if change > threshold else ""
+            print("%-72s %12.4g %12.4g %+7.1f%% %s" % (name, value, baseline, 100 * change, flag))
+            if flag:
+                regressions.append(name)
+        else:
+            print("%-72s %12.4g %12s" % (name, value, "-"))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="number of points of the tables (default: %(default)s)")
+    parser.add_argument("--baselines", default=BASELINES,
+                        help="the JSON file of the baselines (default: %(default)s)")
+    parser.add_argument("--save", action="store_true",
+                        help="store the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="the relative slowdown that is flagged (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    baselines = {"results": {}, "noise": {}}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    results, noise = measure(args.sizes)
+    regressions = compare(results, noise, baselines, args.tolerance)
+
+    if args.save:
+        baselines["results"].update(results)
+        baselines["noise"].update(noise)
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+    elif regressions:
+        print("%d regressions" % len(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
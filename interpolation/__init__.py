@@ -58,7 +58,9 @@ __author__ = "Panagiotis Mavrogiorgos"
 __author_email__ = "gmail pmav99"
 
 # Package imports
-from .linear import LinearInterpolation
+from .linear import LinearInterpolation, LinearSeriesInterpolation
 from .bilinear import BilinearInterpolation
+from .multilinear import MultilinearInterpolation
 
-__all__ = ["LinearInterpolation", "BilinearInterpolation"]
+__all__ = ["LinearInterpolation", "LinearSeriesInterpolation", "BilinearInterpolation",
+           "MultilinearInterpolation"]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/_axis.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Interval searches shared by the interpolation classes.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+from bisect import bisect_left
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:     # only intervals() and weights() need numpy
+    np = None
+
+
+# An axis is uniform if none of its points is further than UNIFORM_RTOL * step from the grid.
+UNIFORM_RTOL = 1e-9
+
+# In the scalar paths, bisect_left() is as fast as the arithmetic lookup for shorter axes.
+SCALAR_UNIFORM_MIN_LENGTH = 65536
+
+# Construction uses numpy for longer arrays only, the call overhead dominates for shorter ones.
+VECTORIZE_MIN_LENGTH = 64
+
+
+def ascending(index):
+    """ Return True if the points of `index` are in strictly ascending order.  """
+    if np is not None and len(index) >= VECTORIZE_MIN_LENGTH:
+        return bool(np.all(np.diff(np.asarray(index, dtype=float)) > 0))
+    return all(x2 > x1 for x1, x2 in zip(index, index[1:]))
+
+
+def uniform_step(index):
+    """ Return the spacing of `index` if its points are equally spaced, otherwise None.  """
+    length = len(index)
+    start = index[0]
+    step = (index[-1] - start) / (length - 1)
+    tolerance = UNIFORM_RTOL * step
+    if np is not None and length >= VECTORIZE_MIN_LENGTH:
+        deviations = np.asarray(index, dtype=float) - (start + step * np.arange(length))
+        uniform = bool(np.all(np.abs(deviations) <= tolerance))
+    else:
+        uniform = all(abs(x - (start + k * step)) <= tolerance for k, x in enumerate(index))
+    return step if uniform else None
+
+
+def bisect_uniform(index, x, step):
+    """ Same as `bisect_left(index, x)` for an `index` that is equally spaced by `step`.  """
+    # like bisect_left(), NaN goes before the first point
+    if not x > index[0]:
+        return 0
+    if x > index[-1]:
+        return len(index)
+    i = min(int((x - index[0]) / step), len(index) - 2)
+    # correct the rounding errors of the division
+    if x <= index[i]:
+        i -= 1
+    elif x > index[i + 1]:
+        i += 1
+    return i + 1
+
+
+def scalar_search(index, step):
+    """ Return the fastest `bisect_left()` equivalent for the scalar lookups on `index`.  """
+    if step is None or len(index) < SCALAR_UNIFORM_MIN_LENGTH:
+        return bisect_left
+    return partial(bisect_uniform, step=step)
+
+
+def as_points(points):
+    """ Return `points` as a numpy array of doubles, raising a `TypeError` for a single number.  """
+    points = np.asarray(points, dtype=float)
+    if not points.ndim:
+        raise TypeError("Expected a sequence of points, got a single number.  Call the table "
+                        "to evaluate a single point.")
+    return points
+
+
+def intervals(index, points, step=None):
+    """
+    Return the interval of `index` that each of `points` falls in, along with the mask of the points
+    that are out of range.  The points out of range are assigned to the edge intervals.
+
+    If `step` is given, the intervals are computed with arithmetic instead of a sorted search.
+    A single number raises a `TypeError`, like in the pure python paths.
+
+    """
+    points = as_points(points)
+    index = np.asarray(index, dtype=float)
+    last = len(index) - 2
+    if step is None:
+        i = np.searchsorted(index, points, side="left") - 1
+        np.clip(i, 0, last, out=i)
+    else:
+        # fmin() maps NaN to the last interval, like searchsorted()
+        i = np.fmax(np.fmin(np.floor((points - index[0]) / step), last), 0).astype(np.intp)
+        # correct the rounding errors of the division
+        i -= points <= index[i]
+        i += points > index[i + 1]
+        np.clip(i, 0, last, out=i)
+    return i, outside(index, points)
+
+
+def outside(index, points):
+    """ Return whether each of `points` is out of the range of `index`.  """
+    # same bounds as the scalar path: bisect_left() returns 0 or length, and 0 for NaN
+    lower, upper = index[0], index[-1]
+    if np is None:
+        return [not lower < x <= upper for x in points]
+    points = np.asarray(points, dtype=float)
+    return ~((points > lower) & (points <= upper))
+
+
+def weights(index, points, step=None):
+    """
+    Return the intervals, the interpolation weights and the out of range mask of `points` along the
+    axis `index`.
+
+    """
+    i, outside = intervals(index, points, step)
+    index = np.asarray(index, dtype=float)
+    x1 = index[i]
+    return i, (points - x1) / (index[i + 1] - x1), outside
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/_buffer.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Contiguous storage of the interpolation tables.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+from array import array
+
+from ._axis import VECTORIZE_MIN_LENGTH
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Tables up to this length keep list copies of their arrays for the scalar lookups, since lists
+# are searched and indexed faster than memoryviews, which box a new float on every access.
+SCALAR_LIST_MAX_LENGTH = 4096
+
+# the bytes of a list item: the pointer and the float object
+LIST_ITEM_BYTES = 32
+
+
+def doubles(data):
+    """
+    Return the sequence of numbers `data` as a one dimensional memoryview of doubles.
+
+    Contiguous buffers of doubles, e.g. numpy arrays or `array("d")` objects, are wrapped without
+    copying; anything else is copied.
+
+    """
+    view = _double_view(data)
+    if view is None:
+        if _vectorize(data, len(data) if hasattr(data, "__len__") else 0):
+            view = memoryview(np.ascontiguousarray(data, dtype=float))
+        else:
+            view = memoryview(array("d", iter(data)))
+    if view.ndim != 1:
+        raise ValueError("Array must be one dimensional.")
+    return view
+
+
+def grid(data, shape, message="values must match the lengths of the indexes."):
+    """
+    Return the nested sequences `data` as a memoryview of doubles with the given `shape`, or
+    raise a `ValueError` with `message` if their lengths do not match it.
+
+    Contiguous buffers of doubles are wrapped without copying; anything else is copied.
+
+    """
+    shape = tuple(shape)
+    view = _double_view(data)
+    if view is None:
+        size = 1
+        for length in shape:
+            size *= length
+        if _vectorize(data, size):
+            try:
+                view = memoryview(np.ascontiguousarray(data, dtype=float))
+            except ValueError:
+                raise ValueError(message)
+        else:
+            flat = array("d")
+            if not _flatten(data, shape, flat):
+                raise ValueError(message)
+            view = memoryview(flat).cast("B").cast("d", shape)
+    if view.shape != shape:
+        raise ValueError(message)
+    return view
+
+
+def _vectorize(data, size):
+    """
+    Return whether to convert `data` with numpy, i.e. if it is a numpy array or it holds enough
+    numbers to outweigh the overhead of numpy.
+
+    """
+    return np is not None and (isinstance(data, np.ndarray) or size >= VECTORIZE_MIN_LENGTH)
+
+
+def _flatten(data, shape, out):
+    """
+    Append the items of the nested sequences `data` to `out` and return whether their lengths
+    match `shape`.
+
+    """
+    if len(data) != shape[0]:
+        return False
+    if len(shape) == 1:
+        out.extend(iter(data))
+        return True
+    return all(_flatten(item, shape[1:], out) for item in data)
+
+
+def _double_view(data):
+    """ Return a memoryview on `data` if it is a contiguous buffer of doubles, otherwise None.  """
+    if isinstance(data, (list, tuple)):
+        return None
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return None
+    if view.format != "d" or not view.c_contiguous:
+        return None
+    return view
+
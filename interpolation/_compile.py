@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/_compile.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Helpers for compiling tables into dense uniform lookup tables.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import copy
+import math
+
+from .stats import uninstrument
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the default memory budget of a compiled table
+MAX_BYTES = 64 * 2 ** 20
+
+
+def extrapolating(table):
+    """ Return a shallow copy of `table` that extrapolates and records no statistics.  """
+    table = copy.copy(table)
+    uninstrument(table)
+    table.extrapolate = True
+    return table
+
+
+def grid_length(index, extrapolate):
+    """
+    Return the initial number of points of the uniform grid that replaces `index`.
+
+    If the table extrapolates, the edge intervals of the grid must fit in the edge intervals of
+    `index`, so that both tables extrapolate along the same lines.
+
+    """
+    length = len(index)
+    if extrapolate:
+        edge = min(index[1] - index[0], index[-1] - index[-2])
+        length = max(length, int(math.ceil((index[-1] - index[0]) / edge)) + 1)
+    return length
+
+
+def grid(index, length):
+    """
+    Return `length` equally spaced points from the first to the last point of `index`.  The last
+    point is exactly the last point of `index`, so that the grid covers the same range.
+
+    """
+    start, stop = index[0], index[-1]
+    step = (stop - start) / (length - 1)
+    points = [start + k * step for k in range(length - 1)]
+    points.append(stop)
+    return points
+
+
+def max_difference(a, b):
+    """ Return the maximum absolute difference of the items of the arrays `a` and `b`.  """
+    if np is not None:
+        return float(np.max(np.abs(np.asarray(a, dtype=float) - np.asarray(b, dtype=float))))
+    return max(abs(x - y) for x, y in zip(_flatten(a), _flatten(b)))
+
+
+def union(a, b):
+    """ Return the sorted union of the points of the axes `a` and `b`.  """
+    if np is not None:
+        return np.union1d(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    return sorted(set(a) | set(b))
+
+
+def _flatten(rows):
+    for row in rows:
+        if hasattr(row, "__len__"):
+            for item in row:
+                yield item
+        else:
+            yield row
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/_io.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+"""
+Binary file format of the interpolation tables.
+
+A table starts with a little endian header: the magic bytes, the format version, the kind of the
+table, the flags, the number of arrays and the spacing of the axes (NaN for non uniform axes).
+The lengths of the arrays follow as unsigned 64 bit integers and then the arrays themselves, as
+doubles in the byte order recorded in the flags.  Every array starts at a multiple of 8 bytes, so
+a file or a shared memory block can be mapped and used without copying.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import mmap
+import struct
+import sys
+from array import array
+
+
+MAGIC = b"INTERPTB"
+VERSION = 1
+
+# kinds
+LINEAR = 1
+BILINEAR = 2
+
+# the table classes of the kinds, registered by their modules
+CLASSES = {}
+
+# flags
+EXTRAPOLATE = 1
+BIG_ENDIAN = 2
+
+_HEADER = struct.Struct("<8sIIIIdd")
+_LENGTH = struct.Struct("<Q")
+_NATIVE = BIG_ENDIAN if sys.byteorder == "big" else 0
+
+
+def save(path, kind, extrapolate, steps, arrays):
+    """ Write the memoryviews of doubles `arrays` of a table of `kind` to `path`.  """
+    with open(path, "wb") as f:
+        f.write(_header(kind, extrapolate, steps, arrays))
+        for data in arrays:
+            f.write(data.cast("B"))
+
+
+def size(arrays):
+    """ Return the number of bytes that a table with `arrays` occupies in the binary format.  """
+    return _HEADER.size + len(arrays) * _LENGTH.size + sum(data.nbytes for data in arrays)
+
+
+def pack_into(buffer, kind, extrapolate, steps, arrays):
+    """ Write a table of `kind` into the writable `buffer`, which must hold `size(arrays)` bytes.  """
+    header = _header(kind, extrapolate, steps, arrays)
+    buffer[:len(header)] = header
+    offset = len(header)
+    for data in arrays:
+        buffer[offset:offset + data.nbytes] = data.cast("B")
+        offset += data.nbytes
+
+
+def load(path, kind, memory_map=True):
+    """
+    Read a table of `kind` from `path` and return its `extrapolate` flag, the spacing of its axes
+    and its arrays as flat memoryviews of doubles.
+
+    If `memory_map` is True, the arrays are views on a read only memory map of the file.
+
+    """
+    with open(path, "rb") as f:
+        if memory_map:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            data = memoryview(f.read())
+    return read(data, kind, path)
+
+
+def kind(path):
+    """ Return the kind of the table that is saved in `path`.  """
+    with open(path, "rb") as f:
+        data = f.read(_HEADER.size)
+    if len(data) < _HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("%s is not an interpolation table." % path)
+    return _HEADER.unpack(data)[2]
+
+
+def read(data, kind, name):
+    """
+    Parse a table of `kind` from the buffer `data` and return the same values as `load()`.  The
+    arrays are views on `data`, unless they have to be byte swapped.  `name` is only used in the
+    error messages.
+
+    """
+    data = memoryview(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("%s is not an interpolation table." % name)
+    magic, version, file_kind, flags, count, x_step, y_step = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("%s is not an interpolation table." % name)
+    if version > VERSION:
+        raise ValueError("%s has unsupported format version %d." % (name, version))
+    if file_kind != kind:
+        raise ValueError("%s does not contain a table of this kind." % name)
+
+    offset = _HEADER.size + count * _LENGTH.size
+    lengths = [_LENGTH.unpack_from(data, _HEADER.size + k * _LENGTH.size)[0] for k in range(count)]
+    if offset + 8 * sum(lengths) > len(data):
+        raise ValueError("%s is truncated." % name)
+
+    arrays = []
+    for length in lengths:
+        view = data[offset:offset + 8 * length].cast("d")
+        if flags & BIG_ENDIAN != _NATIVE:
+            swapped = array("d", view)
+            swapped.byteswap()
+            view = memoryview(swapped)
+        arrays.append(view)
+        offset += 8 * length
+
+    steps = tuple(None if step != step else step for step in (x_step, y_step))
+    return bool(flags & EXTRAPOLATE), steps, arrays
+
+
+def _header(kind, extrapolate, steps, arrays):
+    flags = _NATIVE | (EXTRAPOLATE if extrapolate else 0)
+    steps = [float("nan") if step is None else step for step in steps]
+    header = _HEADER.pack(MAGIC, VERSION, kind, flags, len(arrays), *steps)
+    return header + b"".join(_LENGTH.pack(data.nbytes // 8) for data in arrays)
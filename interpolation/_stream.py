@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/_stream.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Chunked evaluation of unbounded streams of points.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+POLICIES = ("raise", "skip", "sentinel")
+
+
+def chunks(iterable, size):
+    """ Yield lists of at most `size` consecutive items of `iterable`.  """
+    if size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate_chunks(evaluate, chunks, out_of_range, sentinel):
+    """
+    Yield the results of `evaluate` on each of `chunks` one by one, applying the `out_of_range`
+    policy to the points that are outside the table.
+
+    `evaluate(chunk)` must return the results of the chunk along with the mask of the points that
+    are outside the table, or None if the table extrapolates.
+
+    """
+    if out_of_range not in POLICIES:
+        raise ValueError("out_of_range must be one of %r, not %r" % (POLICIES, out_of_range))
+    return _evaluate_chunks(evaluate, chunks, out_of_range, sentinel)
+
+
+def _evaluate_chunks(evaluate, chunks, out_of_range, sentinel):
+    for chunk in chunks:
+        results, outside = evaluate(chunk)
+        # plain python floats are much faster to yield than numpy scalars
+        results = results.tolist()
+        if outside is None or not (outside.any() if np is not None else any(outside)):
+            for result in results:
+                yield result
+        elif out_of_range == "raise":
+            raise ValueError("Extrapolation not allowed!")
+        else:
+            skip = out_of_range == "skip"
+            for result, out in zip(results, outside):
+                if not out:
+                    yield result
+                elif not skip:
+                    yield sentinel
@@ -6,12 +6,52 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
-from bisect import bisect_left
+from array import array
+from time import perf_counter
+
+from . import _axis
+from . import _buffer
+from . import _compile
+from . import _io
+from . import _stream
+from .stats import instrument, uninstrument
+
+try:
+    import numpy as np
+except ImportError:     # numpy is optional; the batch API falls back to pure python
+    np = None
 
 
 class BilinearInterpolation(object):
-    """ Bilinear interpolation with optional extrapolation.  """
-    def __init__(self, x_index, y_index, values, extrapolate=True):
+    """
+    Bilinear interpolation with optional extrapolation.
+
+    If `precompute` is True, the coefficients of the polynomial
+
+        z = a + b * dx + c * dy + d * dx * dy
+
+    are calculated for every cell of the table at construction, where `dx` and `dy` are the
+    distances from the lower corner of the cell.  Each lookup is then reduced to the two searches
+    and a few multiply-adds.  The coefficients are stored as a flat buffer of doubles, i.e. they
+    cost 32 bytes per cell on top of the table itself, so enable it for tables that are queried
+    many more times than there are cells.
+
+    Equally spaced axes are detected at construction and their intervals are calculated with
+    arithmetic instead of a binary search.  The detected spacings are stored in `x_step` and
+    `y_step`, which are None for non uniform axes.  If `validate` is False, the order of the axes
+    is trusted and not checked.
+
+    The axes are stored as contiguous memoryviews of doubles and `values` as a two dimensional
+    memoryview, i.e. `values[j, i]` is the value at `(x_index[i], y_index[j])`.  Buffers of
+    doubles, e.g. numpy arrays or `array("d")` objects, are used without copying, so they should
+    not be modified while the table is in use.
+
+    """
+    __slots__ = ("x_index", "y_index", "values", "coefficients", "x_length", "y_length",
+                 "extrapolate", "x_step", "y_step", "stats", "_x_search", "_y_search")
+
+    def __init__(self, x_index, y_index, values, extrapolate=True, precompute=False,
+                 validate=True):
         # sanity check
         x_length = len(x_index)
         y_length = len(y_index)
@@ -20,9 +60,13 @@ class BilinearInterpolation(object):
             raise ValueError("Table must be at least 2x2.")
         if y_length != len(values):
             raise ValueError("Table must have equal number of rows to y_index.")
-        if any(x2 - x1 <= 0 for x1, x2 in zip(x_index, x_index[1:])):
+        x_index = _buffer.doubles(x_index)
+        y_index = _buffer.doubles(y_index)
+        values = _buffer.grid(values, (y_length, x_length),
+                              "Table must have equal number of columns to x_index.")
+        if validate and not _axis.ascending(x_index):
             raise ValueError("x_index must be in strictly ascending order!")
-        if any(y2 - y1 <= 0 for y1, y2 in zip(y_index, y_index[1:])):
+        if validate and not _axis.ascending(y_index):
             raise ValueError("y_index must be in strictly ascending order!")
 
         self.x_index = x_index
@@ -31,48 +75,449 @@ class BilinearInterpolation(object):
         self.x_length = x_length
         self.y_length = y_length
         self.extrapolate = extrapolate
+        self.x_step = _axis.uniform_step(x_index)
+        self.y_step = _axis.uniform_step(y_index)
+        self._x_search = _axis.scalar_search(x_index, self.x_step)
+        self._y_search = _axis.scalar_search(y_index, self.y_step)
+        self.stats = None
 
-        #slopes = self.slopes = []
-        #for j in range(y_length):
-            #intervals = zip(x_index, x_index[1:], values[j], values[j][1:])
-            #slopes.append([(y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervals])
+        self.coefficients = None
+        if precompute:
+            self.coefficients = _cell_coefficients(x_index, y_index, values)
 
-    def __call__(self, x, y):
-        # local lookups
-        x_index, y_index, values = self.x_index, self.y_index, self.values
+    @classmethod
+    def uniform(cls, x_start, x_step, y_start, y_step, values, extrapolate=True, precompute=False):
+        """
+        Create a table whose axes start at `x_start` and `y_start` and are equally spaced by
+        `x_step` and `y_step` respectively.
 
-        i = bisect_left(x_index, x) - 1
-        j = bisect_left(y_index, y) - 1
+        """
+        x_index = [x_start + k * x_step for k in range(len(values[0]))]
+        y_index = [y_start + k * y_step for k in range(len(values))]
+        return cls(x_index, y_index, values, extrapolate, precompute)
 
-        if self.extrapolate:
-            # fix x index
-            if i == -1:
-                x_slice = slice(None, 2)
-            elif i == self.x_length - 1:
-                x_slice = slice(-2, None)
-            else:
-                x_slice = slice(i, i + 2)
-            # fix y index
-            if j == -1:
-                j = 0
-                y_slice = slice(None, 2)
-            elif j == self.y_length - 1:
-                j = -2
-                y_slice = slice(-2, None)
-            else:
-                y_slice = slice(j, j + 2)
-        else:
-            if i == -1 or i == self.x_length - 1:
+    def save(self, path):
+        """ Save the table, including any precomputed coefficients, to `path` in binary format.  """
+        _io.save(path, *self._state())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a table that was saved with `save()`.
+
+        If `mmap` is True, the file is memory mapped instead of read, so loading is almost instant,
+        the pages are only read when they are used and they are shared by all the processes that
+        load the same file.  The file is trusted and is not validated again.
+
+        """
+        return cls._from_state(*_io.load(path, _io.BILINEAR, mmap))
+
+    def _state(self):
+        """ Return the arguments of `_io.save()` for this table.  """
+        arrays = [self.x_index, self.y_index, self.values]
+        if self.coefficients is not None:
+            arrays.append(self.coefficients)
+        return _io.BILINEAR, self.extrapolate, (self.x_step, self.y_step), arrays
+
+    @classmethod
+    def _from_state(cls, extrapolate, steps, arrays):
+        """ Rebuild a table from the values returned by `_io.load()`, without validating it.  """
+        x_index, y_index, values = arrays[:3]
+        table = cls.__new__(cls)
+        table.x_index = x_index
+        table.y_index = y_index
+        table.values = values.cast("B").cast("d", (len(y_index), len(x_index)))
+        table.coefficients = arrays[3] if len(arrays) > 3 else None
+        table.x_length = len(x_index)
+        table.y_length = len(y_index)
+        table.extrapolate = extrapolate
+        table.x_step, table.y_step = steps
+        table._x_search = _axis.scalar_search(x_index, table.x_step)
+        table._y_search = _axis.scalar_search(y_index, table.y_step)
+        table.stats = None
+        return table
+
+    @property
+    def nbytes(self):
+        """ The number of bytes of the arrays of the table, including the precomputed cells.  """
+        size = self.x_index.nbytes + self.y_index.nbytes + self.values.nbytes
+        if self.coefficients is not None:
+            size += self.coefficients.nbytes
+        return size
+
+    def __call__(self, x, y):
+        # the searches and the clamp are inlined, since they dominate the cost of a call
+        i = self._x_search(self.x_index, x) - 1
+        j = self._y_search(self.y_index, y) - 1
+        if i == -1 or i == self.x_length - 1 or j == -1 or j == self.y_length - 1:
+            if not self.extrapolate:
                 raise ValueError("Extrapolation not allowed!")
-            if j == -1 or j == self.y_length - 1:
+            # use the edge cell
+            i = min(max(i, 0), self.x_length - 2)
+            j = min(max(j, 0), self.y_length - 2)
+        return self._value(x, y, i, j)
+
+    def _cell(self, x, y):
+        """
+        Return the cell `(i, j)` of `(x, y)` and whether the point is out of range.  The points out
+        of range get the edge cells, or raise a `ValueError` if `extrapolate` is False.  Keep in
+        sync with the inlined copy in `__call__()`.
+
+        """
+        i = self._x_search(self.x_index, x) - 1
+        j = self._y_search(self.y_index, y) - 1
+
+        if i == -1 or i == self.x_length - 1 or j == -1 or j == self.y_length - 1:
+            if not self.extrapolate:
                 raise ValueError("Extrapolation not allowed!")
+            # use the edge cell
+            return min(max(i, 0), self.x_length - 2), min(max(j, 0), self.y_length - 2), True
+        return i, j, False
+
+    def _value(self, x, y, i, j):
+        """ Return the value at `(x, y)` of the polynomial of the cell `(i, j)`.  """
+        # local lookups
+        x_index, y_index = self.x_index, self.y_index
+
+        x1 = x_index[i]
+        y1 = y_index[j]
 
-        x1, x2 = x_index[x_slice]
-        y1, y2 = y_index[y_slice]
-        z11, z12 = values[j][x_slice]
-        z21, z22 = values[j + 1][x_slice]
+        coefficients = self.coefficients
+        if coefficients is not None:
+            k = 4 * (j * (self.x_length - 1) + i)
+            dx = x - x1
+            return (coefficients[k] + coefficients[k + 1] * dx +
+                    (coefficients[k + 2] + coefficients[k + 3] * dx) * (y - y1))
+
+        x2 = x_index[i + 1]
+        y2 = y_index[j + 1]
+        # values are stored row per y, so z21 is the value at (x2, y1)
+        values = self.values
+        z11, z21 = values[j, i], values[j, i + 1]
+        z12, z22 = values[j + 1, i], values[j + 1, i + 1]
 
         return (z11 * (x2 - x) * (y2 - y) +
                 z21 * (x - x1) * (y2 - y) +
                 z12 * (x2 - x) * (y - y1) +
                 z22 * (x - x1) * (y - y1)) / ((x2 - x1) * (y2 - y1))
+
+    def evaluate(self, xs, ys, fill=None):
+        """
+        Evaluate the table on the scattered points `(xs[k], ys[k])` and return an array.
+
+        `xs` and `ys` may be numpy arrays, `array.array` objects or any sequences of numbers.  If
+        `extrapolate` is False, the points that lie outside the table either raise a `ValueError`
+        or, if `fill` is given, get `fill` as their value.
+
+        Without numpy the points are evaluated one by one and an `array.array` is returned.
+
+        """
+        if np is None:
+            return array("d", (self._evaluate_one(x, y, fill) for x, y in zip(xs, ys)))
+
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        i, wx, x_outside = _axis.weights(self.x_index, xs, self.x_step)
+        j, wy, y_outside = _axis.weights(self.y_index, ys, self.y_step)
+
+        values = np.asarray(self.values, dtype=float)
+        result = ((values[j, i] * (1 - wx) + values[j, i + 1] * wx) * (1 - wy) +
+                  (values[j + 1, i] * (1 - wx) + values[j + 1, i + 1] * wx) * wy)
+
+        if not self.extrapolate:
+            self._fill_outside(result, x_outside | y_outside, fill)
+        return result
+
+    def value_and_grad(self, x, y):
+        """
+        Return the value of the table at `(x, y)` along with its gradient, i.e. the tuple of the
+        partial derivatives by `x` and `y`, from a single search of the cell.  On the lines of
+        the grid the derivatives of the cell on their lower side are returned.
+
+        """
+        i, j, _ = self._cell(x, y)
+        x_index, y_index = self.x_index, self.y_index
+        x1, x2 = x_index[i], x_index[i + 1]
+        y1, y2 = y_index[j], y_index[j + 1]
+
+        coefficients = self.coefficients
+        if coefficients is not None:
+            k = 4 * (j * (self.x_length - 1) + i)
+            d = coefficients[k + 3]
+            dzdx = coefficients[k + 1] + d * (y - y1)
+            dzdy = coefficients[k + 2] + d * (x - x1)
+        else:
+            values = self.values
+            z11, z21 = values[j, i], values[j, i + 1]
+            z12, z22 = values[j + 1, i], values[j + 1, i + 1]
+            area = (x2 - x1) * (y2 - y1)
+            dzdx = ((z21 - z11) * (y2 - y) + (z22 - z12) * (y - y1)) / area
+            dzdy = ((z12 - z11) * (x2 - x) + (z22 - z21) * (x - x1)) / area
+        return self._value(x, y, i, j), (dzdx, dzdy)
+
+    def value_and_grad_many(self, xs, ys, fill=None):
+        """
+        Return the values and the gradients of the table on the scattered points
+        `(xs[k], ys[k])`, like `value_and_grad()`, as an array of values and a tuple of two arrays
+        of partial derivatives.  The points out of range are handled as in `evaluate()` and `fill`
+        is used for both their value and their derivatives.
+
+        """
+        if np is None:
+            values, dzdx, dzdy = array("d"), array("d"), array("d")
+            for x, y in zip(xs, ys):
+                value, gradient = self._value_and_grad_one(x, y, fill)
+                values.append(value)
+                dzdx.append(gradient[0])
+                dzdy.append(gradient[1])
+            return values, (dzdx, dzdy)
+
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        i, wx, x_outside = _axis.weights(self.x_index, xs, self.x_step)
+        j, wy, y_outside = _axis.weights(self.y_index, ys, self.y_step)
+
+        table = np.asarray(self.values, dtype=float)
+        z11, z21 = table[j, i], table[j, i + 1]
+        z12, z22 = table[j + 1, i], table[j + 1, i + 1]
+        x_index = np.asarray(self.x_index, dtype=float)
+        y_index = np.asarray(self.y_index, dtype=float)
+
+        values = (z11 * (1 - wx) + z21 * wx) * (1 - wy) + (z12 * (1 - wx) + z22 * wx) * wy
+        dzdx = ((z21 - z11) * (1 - wy) + (z22 - z12) * wy) / (x_index[i + 1] - x_index[i])
+        dzdy = ((z12 - z11) * (1 - wx) + (z22 - z21) * wx) / (y_index[j + 1] - y_index[j])
+
+        if not self.extrapolate:
+            outside = x_outside | y_outside
+            for result in (values, dzdx, dzdy):
+                self._fill_outside(result, outside, fill)
+        return values, (dzdx, dzdy)
+
+    def evaluate_grid(self, xs, ys, fill=None):
+        """
+        Evaluate the table on the grid defined by the target axes `xs` and `ys`.
+
+        The result has the same layout as `values`, i.e. one row per `ys` point and one column per
+        `xs` point.  The interval indices and weights are computed once per axis and the grid is
+        produced by interpolating along x for every row of the table and then along y, so the cost
+        is proportional to the size of the output rather than to the number of searches.
+
+        Without numpy a list of `array.array` rows is returned.
+
+        """
+        if np is None:
+            return [self.evaluate(xs, [y] * len(xs), fill) for y in ys]
+
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        i, wx, x_outside = _axis.weights(self.x_index, xs, self.x_step)
+        j, wy, y_outside = _axis.weights(self.y_index, ys, self.y_step)
+
+        # interpolate along x for every row of the table, then along y, in place
+        values = np.asarray(self.values, dtype=float)
+        rows = values.take(i, axis=1)
+        upper = values.take(i + 1, axis=1)
+        upper -= rows
+        upper *= wx
+        rows += upper
+
+        result = rows.take(j, axis=0)
+        upper = rows.take(j + 1, axis=0)
+        upper -= result
+        upper *= wy[:, np.newaxis]
+        result += upper
+
+        if not self.extrapolate:
+            self._fill_outside(result, np.logical_or.outer(y_outside, x_outside), fill)
+        return result
+
+    def compile(self, max_error, max_bytes=_compile.MAX_BYTES):
+        """
+        Resample the table on a dense uniform grid, whose cells are found with index arithmetic
+        instead of a search, and return the new table along with its maximum error.
+
+        Both axes are refined until the maximum absolute difference from this table is at most
+        `max_error` or the new table would need more than `max_bytes`, in which case this table is
+        returned with an error of 0.  The error is exact within the table, since the difference of
+        two piecewise bilinear functions peaks at the nodes of the union of their grids.  If the
+        table extrapolates, the edge cells of the grid are kept within the edge cells of this
+        table, but the error of the extrapolated points may grow with their distance from the
+        table.  The new table is precomputed if this one is.
+
+        """
+        if max_error < 0:
+            raise ValueError("max_error must not be negative.")
+        precompute = self.coefficients is not None
+        source = _compile.extrapolating(self)
+        x_length = _compile.grid_length(self.x_index, self.extrapolate)
+        y_length = _compile.grid_length(self.y_index, self.extrapolate)
+        while _table_bytes(x_length, y_length, precompute) <= max_bytes:
+            # the grids end exactly at the last points, which start + k * step may round below
+            xs = _compile.grid(self.x_index, x_length)
+            ys = _compile.grid(self.y_index, y_length)
+            table = BilinearInterpolation(xs, ys, source.evaluate_grid(xs, ys), self.extrapolate,
+                                          precompute, validate=False)
+            xs = _compile.union(self.x_index, table.x_index)
+            ys = _compile.union(self.y_index, table.y_index)
+            resampled = _compile.extrapolating(table).evaluate_grid(xs, ys)
+            error = _compile.max_difference(source.evaluate_grid(xs, ys), resampled)
+            if error <= max_error:
+                return table, error
+            # halve the cells, so that the new grid contains the old one
+            x_length = 2 * x_length - 1
+            y_length = 2 * y_length - 1
+        return self, 0.0
+
+    def enable_stats(self):
+        """
+        Start collecting usage statistics of `__call__()` and `evaluate()` in `stats` and return
+        them, see `TableStats`.  The statistics are collected by an instrumented subclass, so the
+        lookups are not slowed down at all while they are disabled.
+
+        """
+        return instrument(self, _BilinearStats)
+
+    def disable_stats(self):
+        """ Stop collecting usage statistics and return the collected `stats`.  """
+        return uninstrument(self)
+
+    def stream(self, points, chunk_size=4096, out_of_range="raise", sentinel=None):
+        """
+        Lazily evaluate the table on the `(x, y)` pairs of the iterable `points` and yield the
+        results.
+
+        The points are pulled in chunks of `chunk_size` and each chunk is evaluated with
+        `evaluate()`, so arbitrarily long streams are processed in bounded memory.  If
+        `extrapolate` is False, `out_of_range` decides what happens to the points outside the
+        table: "raise" raises a `ValueError`, "skip" drops them and "sentinel" yields `sentinel`
+        in their place.
+
+        """
+        return _stream.evaluate_chunks(self._evaluate_chunk, _stream.chunks(points, chunk_size),
+                                       out_of_range, sentinel)
+
+    def _evaluate_chunk(self, points):
+        xs, ys = zip(*points)
+        if self.extrapolate:
+            return self.evaluate(xs, ys), None
+        x_outside = _axis.outside(self.x_index, xs)
+        y_outside = _axis.outside(self.y_index, ys)
+        if np is None:
+            outside = [x or y for x, y in zip(x_outside, y_outside)]
+        else:
+            outside = x_outside | y_outside
+        return self.evaluate(xs, ys, fill=0.0), outside
+
+    def _evaluate_one(self, x, y, fill):
+        # bypass any instrumented __call__(), the batch is recorded as a whole
+        try:
+            return BilinearInterpolation.__call__(self, x, y)
+        except ValueError:
+            if fill is None:
+                raise
+            return fill
+
+    def _value_and_grad_one(self, x, y, fill):
+        try:
+            return self.value_and_grad(x, y)
+        except ValueError:
+            if fill is None:
+                raise
+            return fill, (fill, fill)
+
+    @staticmethod
+    def _fill_outside(result, outside, fill):
+        if outside.any():
+            if fill is None:
+                raise ValueError("Extrapolation not allowed!")
+            result[outside] = fill
+
+
+class _BilinearStats(object):
+    """ Instrumented lookups of `BilinearInterpolation`, see `enable_stats()`.  """
+    __slots__ = ()
+
+    def __call__(self, x, y):
+        stats = self.stats
+        start = perf_counter()
+        stats.calls += 1
+        stats.points += 1
+        try:
+            i, j, outside = self._cell(x, y)
+        except ValueError:
+            stats.out_of_range += 1
+            stats.seconds += perf_counter() - start
+            raise
+        if outside:
+            stats.extrapolated += 1
+        else:
+            stats.intervals[i, j] += 1
+        try:
+            return super(_BilinearStats, self).__call__(x, y)
+        finally:
+            stats.seconds += perf_counter() - start
+
+    def evaluate(self, xs, ys, fill=None):
+        start = perf_counter()
+        columns = self.x_length - 1
+        if np is not None:
+            xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+            i, x_outside = _axis.intervals(self.x_index, xs, self.x_step)
+            j, y_outside = _axis.intervals(self.y_index, ys, self.y_step)
+            cells, outside = j * columns + i, x_outside | y_outside
+        else:
+            xs, ys = list(xs), list(ys)
+            i = [self._x_search(self.x_index, x) - 1 for x in xs]
+            j = [self._y_search(self.y_index, y) - 1 for y in ys]
+            cells = [q * columns + p for p, q in zip(i, j)]
+            outside = [p == -1 or p == columns or q == -1 or q == self.y_length - 1
+                       for p, q in zip(i, j)]
+        self.stats.record_batch(cells, outside, self.extrapolate, columns)
+        try:
+            return super(_BilinearStats, self).evaluate(xs, ys, fill)
+        finally:
+            self.stats.seconds += perf_counter() - start
+
+
+def _table_bytes(x_length, y_length, precompute):
+    """ Return the number of bytes of the arrays of a table with the given axes lengths.  """
+    size = 8 * (x_length + y_length + x_length * y_length)
+    if precompute:
+        size += 32 * (x_length - 1) * (y_length - 1)
+    return size
+
+
+def _cell_coefficients(x_index, y_index, values):
+    """
+    Return the coefficients `a, b, c, d` of every cell of the table as a flat memoryview of doubles.
+    The cells are stored row by row, i.e. cell `(i, j)` starts at index
+    `4 * (j * (len(x_index) - 1) + i)`.
+
+    """
+    if np is not None and len(x_index) * len(y_index) >= _axis.VECTORIZE_MIN_LENGTH:
+        x_index = np.asarray(x_index, dtype=float)
+        y_index = np.asarray(y_index, dtype=float)
+        values = np.asarray(values, dtype=float)
+        widths = np.diff(x_index)
+        heights = np.diff(y_index)[:, None]
+        z11, z21 = values[:-1, :-1], values[:-1, 1:]
+        z12, z22 = values[1:, :-1], values[1:, 1:]
+        coefficients = np.stack((z11,
+                                 (z21 - z11) / widths,
+                                 (z12 - z11) / heights,
+                                 (z22 - z21 - z12 + z11) / (widths * heights)), axis=-1)
+        return memoryview(coefficients.ravel())
+
+    coefficients = array("d")
+    widths = [x2 - x1 for x1, x2 in zip(x_index, x_index[1:])]
+    for j in range(len(y_index) - 1):
+        height = y_index[j + 1] - y_index[j]
+        for i, width in enumerate(widths):
+            z11, z21 = values[j, i], values[j, i + 1]
+            z12, z22 = values[j + 1, i], values[j + 1, i + 1]
+            coefficients.extend((z11,
+                                 (z21 - z11) / width,
+                                 (z12 - z11) / height,
+                                 (z22 - z21 - z12 + z11) / (width * height)))
+    return memoryview(coefficients)
+
+
+_io.CLASSES[_io.BILINEAR] = BilinearInterpolation
@@ -39,18 +39,64 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+from array import array
 from bisect import bisect_left
+from time import perf_counter
+
+from . import _axis
+from . import _buffer
+from . import _compile
+from . import _io
+from . import _stream
+from .stats import instrument, uninstrument
+
+try:
+    import numpy as np
+except ImportError:     # numpy is optional; the batch API falls back to pure python
+    np = None
 
 
 class LinearInterpolation(object):
-    def __init__(self, x_index, values, extrapolate=True):
+    """
+    Linear interpolation with optional extrapolation.
+
+    `x_index`, `values` and the precalculated `slopes` are stored as contiguous memoryviews of
+    doubles.  Buffers of doubles, e.g. numpy arrays or `array("d")` objects, are used without
+    copying, so they should not be modified while the table is in use.  Scalar lookups on
+    memoryviews are about 40% slower than on lists, so tables of up to 4096 points also keep list
+    copies for `__call__()`, at 32 more bytes per number.  Longer, lazy and changed tables are
+    looked up in the memoryviews.
+
+    If the points of `x_index` are equally spaced, the interval of each lookup is calculated with
+    arithmetic instead of a binary search.  The detected spacing is stored in `step`, which is None
+    for non uniform tables.
+
+    Points can be added with `append()` and values replaced with `update()`.  If `window` is
+    given, the table keeps only the last `window` points, i.e. it is a sliding window.
+
+    If `validate` is False, the order of `x_index` is trusted and not checked.  If `lazy` is
+    True, each slope is calculated when its interval is first used instead of at construction,
+    which pays off for very large tables that are queried on a few intervals.
+
+    Tables with strictly monotone `values` can be inverted with `inverse()` and `inverse_many()`.
+    Definite integrals are calculated by `integrate()` and `integrate_many()`.
+
+    """
+    __slots__ = ("x_index", "values", "slopes", "length", "extrapolate", "step", "window", "stats",
+                 "_search", "_storage", "_start", "_inverse", "_areas", "_lookup")
+
+    def __init__(self, x_index, values, extrapolate=True, window=None, validate=True, lazy=False):
         # sanity check
         length = len(x_index)
         if length != len(values):
             raise ValueError("Arrays must be of equal length! index:<%r>, values:<%r>" % (x_index, values))
         if length < 2:
             raise ValueError("Arrays must have length at least 2.")
-        if any(x2 - x1 <= 0 for x1, x2 in zip(x_index, x_index[1:])):
+        if window is not None and not 2 <= length <= window:
+            raise ValueError("window must be at least 2 and not shorter than the arrays.")
+        x_index = _buffer.doubles(x_index)
+        values = _buffer.doubles(values)
+        if validate and not _axis.ascending(x_index):
             raise ValueError("index must be in strictly ascending order!")
 
         # attributes
@@ -58,20 +104,773 @@ class LinearInterpolation(object):
         self.values = values
         self.length = length
         self.extrapolate = extrapolate
+        self.step = _axis.uniform_step(x_index)
+        self._search = _axis.scalar_search(x_index, self.step)
+        self.window = window
+        self.stats = None
+        self._storage = None
+        self._start = 0
+        self._inverse = None
+        self._areas = None
 
         # precalculate slopes
-        intervals = zip(x_index, x_index[1:], values, values[1:])
-        self.slopes = [(y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervals]
+        self.slopes = _LazySlopes(x_index, values) if lazy else _slopes(x_index, values)
+        self._cache()
+
+    @classmethod
+    def uniform(cls, start, step, values, extrapolate=True):
+        """ Create a table whose `x_index` starts at `start` and is equally spaced by `step`.  """
+        x_index = [start + k * step for k in range(len(values))]
+        return cls(x_index, values, extrapolate)
+
+    def save(self, path):
+        """ Save the table, including its slopes, to `path` in a binary format.  """
+        _io.save(path, *self._state())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a table that was saved with `save()`.
+
+        If `mmap` is True, the file is memory mapped instead of read, so loading is almost instant,
+        the pages are only read when they are used and they are shared by all the processes that
+        load the same file.  The file is trusted and is not validated again.
+
+        """
+        return cls._from_state(*_io.load(path, _io.LINEAR, mmap))
+
+    def _state(self):
+        """ Return the arguments of `_io.save()` for this table.  """
+        self._materialize()
+        return (_io.LINEAR, self.extrapolate, (self.step, None),
+                (self.x_index, self.values, self.slopes))
+
+    @classmethod
+    def _from_state(cls, extrapolate, steps, arrays):
+        """ Rebuild a table from the values returned by `_io.load()`, without validating it.  """
+        x_index, values, slopes = arrays
+        table = cls.__new__(cls)
+        table.x_index = x_index
+        table.values = values
+        table.slopes = slopes
+        table.length = len(x_index)
+        table.extrapolate = extrapolate
+        table.step = steps[0]
+        table._search = _axis.scalar_search(x_index, table.step)
+        table.window = None
+        table.stats = None
+        table._storage = None
+        table._start = 0
+        table._inverse = None
+        table._areas = None
+        table._cache()
+        return table
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes of the arrays of the table, including the buffers of `append()` and
+        the cached integrals and inverse table.
+
+        """
+        if self._storage is not None:
+            size = sum(data.nbytes for data in self._storage)
+        else:
+            size = self.x_index.nbytes + self.values.nbytes + 8 * len(self.slopes)
+        if self._areas is not None:
+            size += self._areas.nbytes
+        if self._inverse is not None:
+            size += self._inverse.nbytes
+        if self._lookup[0] is not self.x_index:
+            size += _buffer.LIST_ITEM_BYTES * (3 * self.length - 1)
+        return size
 
     def __call__(self, x):
-        i = bisect_left(self.x_index, x) - 1
+        # the search and the clamp are inlined, since they dominate the cost of a call
+        x_index, values, slopes = self._lookup
+        i = self._search(x_index, x) - 1
+        if i == -1 or i == self.length - 1:
+            if not self.extrapolate:
+                raise ValueError("Extrapolation not allowed!")
+            i = 0 if i == -1 else i - 1
+        return values[i] + slopes[i] * (x - x_index[i])
+
+    def _cache(self):
+        """
+        Set the arrays of `__call__()`.  Short tables use list copies of `x_index`, `values` and
+        `slopes`, which are searched and indexed faster than the memoryviews.  Tables that have
+        been changed with `append()` or `update()` and lazy tables use the memoryviews, so that
+        the changes are seen and the slopes stay lazy.
+
+        """
+        arrays = (self.x_index, self.values, self.slopes)
+        if (self.length <= _buffer.SCALAR_LIST_MAX_LENGTH and self._storage is None and
+                not isinstance(self.slopes, _LazySlopes)):
+            arrays = tuple(data.tolist() for data in arrays)
+        self._lookup = arrays
+
+    def _interval(self, x):
+        """
+        Return the interval of `x` and whether `x` is out of range.  The points out of range get
+        the edge intervals, or raise a `ValueError` if `extrapolate` is False.
+
+        """
+        return self._clamp(self._search(self.x_index, x))
+
+    def _clamp(self, position):
+        """
+        Same as `_interval()`, for the `bisect_left()` position of the point in `x_index`.  Keep in
+        sync with the inlined copy in `__call__()`.
+
+        """
+        i = position - 1
+        if i == -1 or i == self.length - 1:
+            if not self.extrapolate:
+                raise ValueError("Extrapolation not allowed!")
+            return (0 if i == -1 else i - 1), True
+        return i, False
+
+    def append(self, x, y):
+        """
+        Append the point (`x`, `y`), where `x` must be larger than the last point of `x_index`.  If
+        the table has a `window` and is full, its first point is dropped.
+
+        Only the slope of the new interval is calculated.  On the first change the arrays are copied
+        into buffers with room for more points, which are reallocated only when they are full, so
+        appending costs O(1) amortized.  `x_index`, `values` and `slopes` are replaced by views on
+        the buffers.
+
+        """
+        last = self.x_index[-1]
+        if not x > last:
+            raise ValueError("index must be in strictly ascending order!")
+        if self._storage is None or self._start + self.length == len(self._storage[0]):
+            self._reserve()
+        start, length = self._start, self.length
+        if length == self.window:
+            start += 1
+            length -= 1
+
+        x_index, values, slopes = self._storage
+        end = start + length
+        x_index[end] = x
+        values[end] = y
+        slopes[end - 1] = (y - values[end - 1]) / (x - last)
+        self._resize(start, length + 1)
+        self._inverse = None
+        self._areas = None
+
+        step = self.step
+        if step is not None:
+            if abs(x - (x_index[start] + length * step)) > _axis.UNIFORM_RTOL * step:
+                self.step = None
+        self._search = _axis.scalar_search(self.x_index, self.step)
+
+    def update(self, i, y):
+        """ Replace the value of the `i`-th point with `y` and recalculate its two slopes.  """
+        length = self.length
+        if not -length <= i < length:
+            raise IndexError("index out of range")
+        i %= length
+        if self._storage is None:
+            self._reserve()
+
+        x_index, values, slopes = self.x_index, self.values, self.slopes
+        values[i] = y
+        self._inverse = None
+        self._areas = None
+        if i > 0:
+            slopes[i - 1] = (y - values[i - 1]) / (x_index[i] - x_index[i - 1])
+        if i < length - 1:
+            slopes[i] = (values[i + 1] - y) / (x_index[i + 1] - x_index[i])
+
+    def _reserve(self):
+        """ Copy the arrays to the start of new buffers that have room for more points.  """
+        self._materialize()
+        length = self.length
+        capacity = 2 * (self.window or length)
+        self._storage = tuple(memoryview(array("d", bytes(8 * capacity))) for _ in range(3))
+        x_index, values, slopes = self._storage
+        x_index[:length] = self.x_index
+        values[:length] = self.values
+        slopes[:length - 1] = self.slopes
+        self._resize(0, length)
+
+    def _slopes_at(self, i):
+        """ Return the slopes of the numpy array of intervals `i`.  """
+        slopes = self.slopes
+        if isinstance(slopes, _LazySlopes):
+            return slopes[i]
+        return np.asarray(slopes, dtype=float)[i]
+
+    def _materialize(self):
+        """ Calculate the missing slopes of a lazy table and store them as a memoryview.  """
+        if isinstance(self.slopes, _LazySlopes):
+            self.slopes = self.slopes.view()
+            self._cache()
+
+    def _resize(self, start, length):
+        """ Point the arrays to the `length` points of the buffers that begin at `start`.  """
+        x_index, values, slopes = self._storage
+        self.x_index = x_index[start:start + length]
+        self.values = values[start:start + length]
+        self.slopes = slopes[start:start + length - 1]
+        self.length = length
+        self._start = start
+        self._cache()
+
+    def evaluate(self, xs, fill=None):
+        """
+        Evaluate the table on every point of `xs` and return an array.
+
+        `xs` may be a numpy array, an `array.array` or any sequence of numbers.  If `extrapolate`
+        is False, the points that lie outside `x_index` either raise a `ValueError` or, if `fill`
+        is given, get `fill` as their value.
+
+        When numpy is available the whole batch is evaluated with a single sorted search, or index
+        arithmetic on uniform tables, plus vectorized arithmetic and a numpy array is returned;
+        otherwise an `array.array` of doubles is returned.
+
+        """
+        if np is None:
+            return array("d", (self._evaluate_one(x, fill) for x in xs))
+
+        xs = np.asarray(xs, dtype=float)
+        i, outside = _axis.intervals(self.x_index, xs, self.step)
+        return self._evaluate_intervals(xs, i, outside, fill)
+
+    def value_and_grad(self, x):
+        """
+        Return the value of the table at `x` along with its derivative, i.e. the slope of the
+        interval of `x`, from a single search.  At the points of `x_index` the slope of the
+        interval on their left is returned and the extrapolated lines have the slopes of the edge
+        intervals.
+
+        """
+        i, _ = self._interval(x)
+        slope = self.slopes[i]
+        return self.values[i] + slope * (x - self.x_index[i]), slope
+
+    def value_and_grad_many(self, xs, fill=None):
+        """
+        Return the values and the derivatives of the table on every point of `xs`, like
+        `value_and_grad()`, as two arrays.  The points out of range are handled as in `evaluate()`
+        and `fill` is used for both their value and their derivative.
+
+        """
+        if np is None:
+            values, slopes = array("d"), array("d")
+            for x in xs:
+                value, slope = self._value_and_grad_one(x, fill)
+                values.append(value)
+                slopes.append(slope)
+            return values, slopes
+
+        xs = np.asarray(xs, dtype=float)
+        i, outside = _axis.intervals(self.x_index, xs, self.step)
+        slopes = self._slopes_at(i)
+        values = (np.asarray(self.values, dtype=float)[i] +
+                  slopes * (xs - np.asarray(self.x_index, dtype=float)[i]))
+
+        if not self.extrapolate:
+            if outside.any():
+                if fill is None:
+                    raise ValueError("Extrapolation not allowed!")
+                values[outside] = slopes[outside] = fill
+        return values, slopes
+
+    def _value_and_grad_one(self, x, fill):
+        try:
+            return self.value_and_grad(x)
+        except ValueError:
+            if fill is None:
+                raise
+            return fill, fill
+
+    def inverse(self, y):
+        """
+        Return the `x` at which the table takes the value `y`.
+
+        The `values` must be strictly monotone.  The first call builds the inverse table, whose
+        index is `values`, so each query costs a single search and a multiply-add.  Values out of
+        the range of the table are extrapolated, or raise a `ValueError` if `extrapolate` is False.
+
+        """
+        return self._inverse_table()(y)
+
+    def inverse_many(self, ys, fill=None):
+        """ Return the `x` of every value of `ys`, like `inverse()`, as `evaluate()` does.  """
+        return self._inverse_table().evaluate(ys, fill)
+
+    def _inverse_table(self):
+        """ Return the table that maps `values` to `x_index`, building it on first use.  """
+        inverse = self._inverse
+        if inverse is None:
+            values, x_index = self.values, self.x_index
+            if not _axis.ascending(values):
+                if np is not None:
+                    values, x_index = np.asarray(values)[::-1], np.asarray(x_index)[::-1]
+                else:
+                    values, x_index = values[::-1], x_index[::-1]
+                if not _axis.ascending(values):
+                    raise ValueError("values must be strictly monotone to be inverted.")
+            inverse = self._inverse = LinearInterpolation(values, x_index, validate=False)
+        inverse.extrapolate = self.extrapolate
+        return inverse
+
+    def integrate(self, a, b):
+        """
+        Return the integral of the table from `a` to `b`.
+
+        The first call calculates the prefix sums of the areas of the intervals, so each integral
+        costs two searches.  The extrapolated lines are integrated as well, unless `extrapolate` is
+        False, in which case `a` and `b` must lie within `x_index`.
+
+        """
+        return self._antiderivative(b) - self._antiderivative(a)
+
+    def integrate_many(self, a, b, fill=None):
+        """
+        Return the integrals of the table over the ranges from every point of `a` to the matching
+        point of `b`, like `integrate()`.  The return value and the handling of the ranges out of
+        the table are the same as in `evaluate()`.
+
+        """
+        if np is None:
+            return array("d", (self._integrate_one(lower, upper, fill)
+                               for lower, upper in zip(a, b)))
+
+        a = np.asarray(a, dtype=float)
+        b = np.asarray(b, dtype=float)
+        result = self._antiderivative_many(b) - self._antiderivative_many(a)
+        if not self.extrapolate:
+            # the same bounds as _antiderivative(), NaN is out of range
+            lower, upper = self.x_index[0], self.x_index[-1]
+            outside = ~((a >= lower) & (a <= upper) & (b >= lower) & (b <= upper))
+            if outside.any():
+                if fill is None:
+                    raise ValueError("Extrapolation not allowed!")
+                result[outside] = fill
+        return result
+
+    def _integrate_one(self, a, b, fill):
+        try:
+            return self.integrate(a, b)
+        except ValueError:
+            if fill is None:
+                raise
+            return fill
+
+    def _antiderivative(self, x):
+        """ Return the integral of the table from the first point of `x_index` to `x`.  """
+        x_index = self.x_index
+        if not self.extrapolate and not x_index[0] <= x <= x_index[-1]:
+            raise ValueError("Extrapolation not allowed!")
+        i = min(max(self._search(x_index, x) - 1, 0), self.length - 2)
+        dx = x - x_index[i]
+        return self._prefix_areas()[i] + (self.values[i] + self.slopes[i] * dx / 2) * dx
+
+    def _antiderivative_many(self, xs):
+        i, _ = _axis.intervals(self.x_index, xs, self.step)
+        dx = xs - np.asarray(self.x_index, dtype=float)[i]
+        areas = np.asarray(self._prefix_areas(), dtype=float)
+        values = np.asarray(self.values, dtype=float)
+        return areas[i] + (values[i] + self._slopes_at(i) * dx / 2) * dx
+
+    def _prefix_areas(self):
+        """ Return the integrals of the table up to each point of `x_index`, calculated once.  """
+        areas = self._areas
+        if areas is None:
+            if np is not None:
+                x_index = np.asarray(self.x_index, dtype=float)
+                values = np.asarray(self.values, dtype=float)
+                areas = np.zeros(self.length)
+                np.cumsum(np.diff(x_index) * (values[:-1] + values[1:]) / 2, out=areas[1:])
+            else:
+                x_index, values = self.x_index, self.values
+                areas = array("d", [0.0])
+                for k in range(self.length - 1):
+                    areas.append(areas[k] +
+                                 (x_index[k + 1] - x_index[k]) * (values[k] + values[k + 1]) / 2)
+            areas = self._areas = memoryview(areas)
+        return areas
+
+    def cursor(self):
+        """ Return a `LinearCursor`, for lookups whose points are close to the previous ones.  """
+        return LinearCursor(self)
+
+    def resample(self, xs, fill=None):
+        """
+        Evaluate the table on the points of `xs`, which must be in ascending order.
+
+        With numpy, if there are fewer points than `x_index`, each point is searched in
+        `x_index` as in `evaluate()`, i.e. O(m log n) for `m` points.  Otherwise `x_index` is
+        searched in the points and the intervals are accumulated, i.e. O(n log m + m), which is
+        cheaper than `evaluate()` for batches much longer than the table.  Without numpy the
+        points are walked with a `cursor()`.  The return value and the handling of the points out
+        of range are the same as in `evaluate()`.
+
+        """
+        if np is None:
+            cursor = self.cursor()
+            result = array("d")
+            previous = None
+            for x in xs:
+                if previous is not None and x < previous:
+                    raise ValueError("Points must be in ascending order!")
+                previous = x
+                result.append(cursor._evaluate_one(x, fill))
+            return result
+
+        xs = _axis.as_points(xs)
+        if np.any(xs[1:] < xs[:-1]):
+            raise ValueError("Points must be in ascending order!")
+        if len(xs) < self.length:
+            i, outside = _axis.intervals(self.x_index, xs, self.step)
+            return self._evaluate_intervals(xs, i, outside, fill)
+
+        # the number of index points that are smaller than each of xs, i.e. bisect_left()
+        x_index = np.asarray(self.x_index, dtype=float)
+        counts = np.bincount(np.searchsorted(xs, x_index, side="left"), minlength=len(xs) + 1)
+        i = np.cumsum(counts[:len(xs)]) - 1
+        np.clip(i, 0, self.length - 2, out=i)
+        return self._evaluate_intervals(xs, i, _axis.outside(x_index, xs), fill)
+
+    def compile(self, max_error, max_bytes=_compile.MAX_BYTES):
+        """
+        Resample the table on a dense uniform grid, whose intervals are found with index arithmetic
+        instead of a search, and return the new table along with its maximum error.
+
+        The grid is refined until the maximum absolute difference from this table is at most
+        `max_error` or the new table would need more than `max_bytes`, in which case this table is
+        returned with an error of 0.  The error is exact, since the difference of two piecewise
+        linear functions peaks at their breakpoints.  If the table extrapolates, the edge intervals
+        of the grid are kept within the edge intervals of `x_index`, so that the extrapolation is
+        the same too.
+
+        """
+        if max_error < 0:
+            raise ValueError("max_error must not be negative.")
+        source = _compile.extrapolating(self)
+        length = _compile.grid_length(self.x_index, self.extrapolate)
+        while 24 * length <= max_bytes:
+            # the grid ends exactly at the last point, which start + k * step may round below
+            points = _compile.grid(self.x_index, length)
+            table = LinearInterpolation(points, source.evaluate(points), self.extrapolate,
+                                        validate=False)
+            resampled = _compile.extrapolating(table).evaluate(self.x_index)
+            error = _compile.max_difference(self.values, resampled)
+            if error <= max_error:
+                return table, error
+            # halve the intervals, so that the new grid contains the old one
+            length = 2 * length - 1
+        return self, 0.0
+
+    def enable_stats(self):
+        """
+        Start collecting usage statistics of `__call__()` and `evaluate()` in `stats` and return
+        them, see `TableStats`.  The statistics are collected by an instrumented subclass, so the
+        lookups are not slowed down at all while they are disabled.
+
+        """
+        return instrument(self, _LinearStats)
+
+    def disable_stats(self):
+        """ Stop collecting usage statistics and return the collected `stats`.  """
+        return uninstrument(self)
+
+    def stream(self, xs, chunk_size=4096, out_of_range="raise", sentinel=None):
+        """
+        Lazily evaluate the table on the points of the iterable `xs` and yield the results.
+
+        The points are pulled in chunks of `chunk_size` and each chunk is evaluated with
+        `evaluate()`, so arbitrarily long streams are processed in bounded memory.  If
+        `extrapolate` is False, `out_of_range` decides what happens to the points outside
+        `x_index`: "raise" raises a `ValueError`, "skip" drops them and "sentinel" yields
+        `sentinel` in their place.
+
+        """
+        return _stream.evaluate_chunks(self._evaluate_chunk, _stream.chunks(xs, chunk_size),
+                                       out_of_range, sentinel)
+
+    def _evaluate_chunk(self, xs):
         if self.extrapolate:
-            if i == -1:
-                i = 0
-            elif i == self.length - 1:
-                i = -1
+            return self.evaluate(xs), None
+        return self.evaluate(xs, fill=0.0), _axis.outside(self.x_index, xs)
+
+    def _evaluate_intervals(self, xs, i, outside, fill):
+        x_index = np.asarray(self.x_index, dtype=float)
+        values = np.asarray(self.values, dtype=float)
+        result = values[i] + self._slopes_at(i) * (xs - x_index[i])
+
+        if not self.extrapolate:
+            if outside.any():
+                if fill is None:
+                    raise ValueError("Extrapolation not allowed!")
+                result[outside] = fill
+        return result
+
+    def _evaluate_one(self, x, fill):
+        # bypass any instrumented __call__(), the batch is recorded as a whole
+        try:
+            return LinearInterpolation.__call__(self, x)
+        except ValueError:
+            if fill is None:
+                raise
+            return fill
+
+
+def _slopes(x_index, values):
+    """ Return the slopes of the intervals of the table as a memoryview of doubles.  """
+    if np is not None and len(x_index) >= _axis.VECTORIZE_MIN_LENGTH:
+        x_index = np.asarray(x_index, dtype=float)
+        return memoryview(np.diff(np.asarray(values, dtype=float)) / np.diff(x_index))
+    intervals = zip(x_index, x_index[1:], values, values[1:])
+    return memoryview(array("d", ((y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervals)))
+
+
+class _LazySlopes(object):
+    """
+    The slopes of a lazy `LinearInterpolation` table, which are calculated on first use.
+
+    The calculated slopes are cached in a buffer of doubles, where NaN marks the missing ones.
+    Indexing with an integer returns one slope and indexing with a numpy array of intervals, as
+    the batch lookups do, returns a numpy array.
+
+    """
+    __slots__ = ("x_index", "values", "cache")
+
+    def __init__(self, x_index, values):
+        self.x_index = x_index
+        self.values = values
+        self.cache = memoryview(array("d", [float("nan")]) * (len(x_index) - 1))
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __getitem__(self, i):
+        if np is not None and isinstance(i, np.ndarray):
+            cache = np.asarray(self.cache)
+            slopes = cache[i]
+            missing = np.isnan(slopes)
+            if missing.any():
+                i = i[missing]
+                x_index = np.asarray(self.x_index, dtype=float)
+                values = np.asarray(self.values, dtype=float)
+                slopes[missing] = cache[i] = ((values[i + 1] - values[i]) /
+                                              (x_index[i + 1] - x_index[i]))
+            return slopes
+
+        slope = self.cache[i]
+        if slope != slope:
+            i %= len(self.cache)
+            x_index, values = self.x_index, self.values
+            slope = self.cache[i] = (values[i + 1] - values[i]) / (x_index[i + 1] - x_index[i])
+        return slope
+
+    def view(self):
+        """ Calculate the missing slopes and return all of them as a memoryview.  """
+        if np is not None:
+            self[np.arange(len(self.cache))]
+        else:
+            for i in range(len(self.cache)):
+                self[i]
+        return self.cache
+
+
+class _LinearStats(object):
+    """ Instrumented lookups of `LinearInterpolation`, see `enable_stats()`.  """
+    __slots__ = ()
+
+    def __call__(self, x):
+        stats = self.stats
+        start = perf_counter()
+        stats.calls += 1
+        stats.points += 1
+        try:
+            i, outside = self._interval(x)
+        except ValueError:
+            stats.out_of_range += 1
+            stats.seconds += perf_counter() - start
+            raise
+        if outside:
+            stats.extrapolated += 1
+        else:
+            stats.intervals[i] += 1
+        try:
+            return super(_LinearStats, self).__call__(x)
+        finally:
+            stats.seconds += perf_counter() - start
+
+    def evaluate(self, xs, fill=None):
+        start = perf_counter()
+        if np is not None:
+            xs = np.asarray(xs, dtype=float)
+            i, outside = _axis.intervals(self.x_index, xs, self.step)
+        else:
+            xs = list(xs)
+            i = [self._search(self.x_index, x) - 1 for x in xs]
+            outside = [p == -1 or p == self.length - 1 for p in i]
+        self.stats.record_batch(i, outside, self.extrapolate)
+        try:
+            return super(_LinearStats, self).evaluate(xs, fill)
+        finally:
+            self.stats.seconds += perf_counter() - start
+
+
+class LinearCursor(object):
+    """
+    Lookups on a `LinearInterpolation` table that remember the interval of the previous query.
+
+    Each lookup starts from the previous interval and gallops outwards, so streams of queries that
+    move forward or backward by a few intervals at a time avoid the full binary search.  The
+    results are the same as the ones of the table.
+
+    """
+    __slots__ = ("table", "position")
+
+    def __init__(self, table):
+        self.table = table
+        # the bisect_left() result of the previous query
+        self.position = 1
+
+    def __call__(self, x):
+        table = self.table
+        x_index = table.x_index
+        length = table.length
+        p = self.position
+
+        if p < length and x > x_index[p]:
+            # gallop forward
+            lo = hi = p + 1
+            step = 1
+            while hi < length and x > x_index[hi]:
+                lo = hi + 1
+                hi += step
+                step *= 2
+            p = bisect_left(x_index, x, lo, min(hi, length))
+        elif p > 0 and x <= x_index[p - 1]:
+            # gallop backward
+            lo = hi = p - 1
+            step = 1
+            while lo > 0 and x <= x_index[lo - 1]:
+                hi = lo - 1
+                lo = max(hi - step, 0)
+                step *= 2
+            p = bisect_left(x_index, x, lo, hi)
+        self.position = p
+
+        i, _ = table._clamp(p)
+        return table.values[i] + table.slopes[i] * (x - x_index[i])
+
+    def _evaluate_one(self, x, fill):
+        try:
+            return self(x)
+        except ValueError:
+            if fill is None:
+                raise
+            return fill
+
+
+class LinearSeriesInterpolation(object):
+    """
+    Linear interpolation of many series that share the same `x_index`.
+
+    `values` is a two dimensional block with one row per point of `x_index` and one column per
+    series, i.e. `values[i, k]` is the value of series `k` at `x_index[i]`.  The index is validated
+    and searched once for all the series, and each lookup returns the values of all the series.
+
+    The extrapolation rules and the storage are the same as in `LinearInterpolation`.
+
+    """
+    __slots__ = ("x_index", "values", "slopes", "length", "columns", "extrapolate", "step",
+                 "_search")
+
+    def __init__(self, x_index, values, extrapolate=True):
+        # sanity check
+        length = len(x_index)
+        if length != len(values):
+            raise ValueError("values must have one row per point of x_index.")
+        if length < 2:
+            raise ValueError("Arrays must have length at least 2.")
+        columns = len(values[0])
+        if columns < 1:
+            raise ValueError("values must have at least one column.")
+        x_index = _buffer.doubles(x_index)
+        values = _buffer.grid(values, (length, columns))
+        if not _axis.ascending(x_index):
+            raise ValueError("index must be in strictly ascending order!")
+
+        # attributes
+        self.x_index = x_index
+        self.values = values
+        self.length = length
+        self.columns = columns
+        self.extrapolate = extrapolate
+        self.step = _axis.uniform_step(x_index)
+        self._search = _axis.scalar_search(x_index, self.step)
+
+        # precalculate slopes, one row per interval
+        if np is not None and length * columns >= _axis.VECTORIZE_MIN_LENGTH:
+            widths = np.diff(np.asarray(x_index, dtype=float))[:, None]
+            self.slopes = memoryview(np.diff(np.asarray(values, dtype=float), axis=0) / widths)
         else:
-            if i == -1 or i == self.length - 1:
+            slopes = array("d")
+            for i in range(length - 1):
+                width = x_index[i + 1] - x_index[i]
+                slopes.extend((values[i + 1, k] - values[i, k]) / width for k in range(columns))
+            self.slopes = memoryview(slopes).cast("B").cast("d", (length - 1, columns))
+
+    @property
+    def nbytes(self):
+        """ The number of bytes of the arrays of the table.  """
+        return self.x_index.nbytes + self.values.nbytes + self.slopes.nbytes
+
+    def __call__(self, x):
+        """ Return the values of all the series at `x`.  """
+        i = self._search(self.x_index, x) - 1
+        if i == -1 or i == self.length - 1:
+            if not self.extrapolate:
                 raise ValueError("Extrapolation not allowed!")
+            i = min(max(i, 0), self.length - 2)
+
+        dx = x - self.x_index[i]
+        if np is not None:
+            return np.asarray(self.values)[i] + np.asarray(self.slopes)[i] * dx
+        values, slopes = self.values, self.slopes
+        return array("d", (values[i, k] + slopes[i, k] * dx for k in range(self.columns)))
+
+    def evaluate(self, xs, fill=None):
+        """
+        Evaluate all the series on every point of `xs` and return a matrix with one row per point.
+
+        The out of range points are handled as in `LinearInterpolation.evaluate()`.  Without numpy
+        a list of `array.array` rows is returned.
+
+        """
+        if np is None:
+            return [self._evaluate_one(x, fill) for x in xs]
+
+        xs = np.asarray(xs, dtype=float)
+        x_index = np.asarray(self.x_index)
+        i, outside = _axis.intervals(x_index, xs, self.step)
+        dx = (xs - x_index[i])[..., np.newaxis]
+        result = np.asarray(self.values)[i] + np.asarray(self.slopes)[i] * dx
+
+        if not self.extrapolate:
+            if outside.any():
+                if fill is None:
+                    raise ValueError("Extrapolation not allowed!")
+                result[outside] = fill
+        return result
+
+    def _evaluate_one(self, x, fill):
+        try:
+            return self(x)
+        except ValueError:
+            if fill is None:
+                raise
+            return array("d", [fill] * self.columns)
+
 
-        return self.values[i] + self.slopes[i] * (x - self.x_index[i])
+_io.CLASSES[_io.LINEAR] = LinearInterpolation
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/multilinear.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+from array import array
+
+from . import _axis
+from . import _buffer
+
+try:
+    import numpy as np
+except ImportError:     # numpy is optional; the batch API falls back to pure python
+    np = None
+
+
+class MultilinearInterpolation(object):
+    """
+    Multilinear interpolation on N dimensional tables with optional extrapolation.
+
+    `indexes` is a sequence of N strictly ascending axes and `values[k0, k1, ...]` is the value at
+    `(indexes[0][k0], indexes[1][k1], ...)`, i.e. `values` has one dimension per axis, in the same
+    order.  Note that this is the transpose of the `BilinearInterpolation` layout, whose rows follow
+    the y axis: `BilinearInterpolation(x_index, y_index, values)(x, y)` is equal to
+    `MultilinearInterpolation((y_index, x_index), values)(y, x)`.
+
+    If a point is outside the table and `extrapolate` is True, the edge cells are extrapolated
+    linearly; otherwise a `ValueError` is raised.
+
+    The axes and `values` are stored as contiguous memoryviews of doubles and equally spaced axes
+    are searched with arithmetic, as in the other interpolation classes.
+
+    """
+    __slots__ = ("indexes", "values", "shape", "strides", "ndim", "extrapolate", "steps",
+                 "_flat", "_searches")
+
+    def __init__(self, indexes, values, extrapolate=True):
+        # sanity check
+        if len(indexes) < 1:
+            raise ValueError("Table must have at least one axis.")
+        if any(len(index) < 2 for index in indexes):
+            raise ValueError("Table must have at least 2 points per axis.")
+        indexes = tuple(_buffer.doubles(index) for index in indexes)
+        for axis, index in enumerate(indexes):
+            if not _axis.ascending(index):
+                raise ValueError("Index of axis %d must be in strictly ascending order!" % axis)
+        shape = tuple(len(index) for index in indexes)
+        values = _buffer.grid(values, shape)
+
+        # the distance between consecutive points of each axis in the flat values
+        strides = [1] * len(shape)
+        for axis in range(len(shape) - 2, -1, -1):
+            strides[axis] = strides[axis + 1] * shape[axis + 1]
+
+        self.indexes = indexes
+        self.values = values
+        self.shape = shape
+        self.strides = tuple(strides)
+        self.ndim = len(shape)
+        self.extrapolate = extrapolate
+        self.steps = tuple(_axis.uniform_step(index) for index in indexes)
+        self._flat = values.cast("B").cast("d")
+        self._searches = tuple(_axis.scalar_search(index, step)
+                               for index, step in zip(indexes, self.steps))
+
+    @property
+    def nbytes(self):
+        """ The number of bytes of the arrays of the table.  """
+        return sum(index.nbytes for index in self.indexes) + self.values.nbytes
+
+    def __call__(self, *point):
+        if len(point) != self.ndim:
+            raise ValueError("Expected %d coordinates, got %d." % (self.ndim, len(point)))
+
+        offset = 0
+        weights = []
+        for x, index, length, stride, search in zip(point, self.indexes, self.shape,
+                                                     self.strides, self._searches):
+            i = search(index, x) - 1
+            if i == -1 or i == length - 1:
+                if not self.extrapolate:
+                    raise ValueError("Extrapolation not allowed!")
+                # use the edge cell
+                i = min(max(i, 0), length - 2)
+            x1 = index[i]
+            weights.append((x - x1) / (index[i + 1] - x1))
+            offset += i * stride
+
+        # the 2^N corners of the cell, ordered so that consecutive pairs differ in the last axis
+        corners = [offset]
+        for stride in self.strides:
+            corners = [corner + step for corner in corners for step in (0, stride)]
+        flat = self._flat
+        results = [flat[corner] for corner in corners]
+
+        # collapse the corners one axis at a time, starting from the last one
+        for weight in reversed(weights):
+            results = [z1 + (z2 - z1) * weight for z1, z2 in zip(results[::2], results[1::2])]
+        return results[0]
+
+    def evaluate(self, coordinates, fill=None):
+        """
+        Evaluate the table on many points and return an array.
+
+        `coordinates` holds one sequence of coordinates per axis, e.g. `(xs, ys, zs)` for a three
+        dimensional table, or equivalently an `(N, m)` numpy array.  If `extrapolate` is False,
+        the points that lie outside the table either raise a `ValueError` or, if `fill` is given,
+        get `fill` as their value.
+
+        When numpy is available, each axis is searched once for the whole batch and the corners of
+        all the cells are combined with vectorized arithmetic.  Otherwise the points are evaluated
+        one by one and an `array.array` is returned.
+
+        """
+        if len(coordinates) != self.ndim:
+            raise ValueError("Expected %d coordinates, got %d." % (self.ndim, len(coordinates)))
+        if np is None:
+            return array("d", (self._evaluate_one(point, fill) for point in zip(*coordinates)))
+
+        coordinates = np.broadcast_arrays(*[np.asarray(xs, dtype=float) for xs in coordinates])
+        offsets = 0
+        weights = []
+        outside = False
+        for xs, index, stride, step in zip(coordinates, self.indexes, self.strides, self.steps):
+            i, weight, out = _axis.weights(index, xs, step)
+            offsets = offsets + i * stride
+            weights.append(weight)
+            outside = outside | out
+
+        corners = [offsets]
+        for stride in self.strides:
+            corners = [corner + step for corner in corners for step in (0, stride)]
+        flat = np.asarray(self._flat)
+        results = [flat[corner] for corner in corners]
+        for weight in reversed(weights):
+            results = [z1 + (z2 - z1) * weight for z1, z2 in zip(results[::2], results[1::2])]
+        result = results[0]
+
+        if not self.extrapolate and np.any(outside):
+            if fill is None:
+                raise ValueError("Extrapolation not allowed!")
+            result[outside] = fill
+        return result
+
+    def _evaluate_one(self, point, fill):
+        try:
+            return self(*point)
+        except ValueError:
+            if fill is None:
+                raise
+            return fill
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/parallel.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+"""
+Parallel evaluation of the interpolation tables.
+
+`ParallelEvaluator` splits large batches of points across a pool of worker processes or threads.
+With processes, the table is published once in a `multiprocessing.shared_memory` block, in the
+binary format of `save()`, and every worker maps it instead of receiving a pickled copy.  The
+points and the results are exchanged through shared memory too, so only the slice boundaries are
+pickled for each task.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+
+from . import _buffer
+from . import _io
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the table of the worker process, set by _attach()
+_table = None
+_table_memory = None
+
+
+class ParallelEvaluator(object):
+    """
+    Evaluate a `LinearInterpolation` or a `BilinearInterpolation` on large batches of points with
+    `workers` processes, or threads if `processes` is False.
+
+    Threads avoid the shared memory altogether and scale as far as numpy releases the GIL, while
+    processes scale with the number of cores but pay for copying the points in and the results
+    out of shared memory.  The evaluator must be closed, or used as a context manager, to stop the
+    workers and release the shared memory.
+
+    """
+    def __init__(self, table, workers=None, processes=True):
+        kind, extrapolate, steps, arrays = table._state()
+        self.table = table
+        self.workers = workers or os.cpu_count() or 1
+        self.processes = processes
+        self._memory = None
+        if processes:
+            self._memory = SharedMemory(create=True, size=_io.size(arrays))
+            _io.pack_into(self._memory.buf, kind, extrapolate, steps, arrays)
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_attach,
+                                                 initargs=(self._memory.name, kind))
+        else:
+            self._executor = ThreadPoolExecutor(self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Stop the workers and release the shared memory of the table.  """
+        self._executor.shutdown()
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def evaluate(self, xs, ys=None, fill=None, out=None):
+        """
+        Evaluate the table on the points `xs`, or on the pairs `(xs, ys)` for bilinear tables, and
+        return the results in `out`.
+
+        `out` is a preallocated writable buffer of doubles with one item per point.  If it is
+        omitted, a numpy array, or an `array.array` without numpy, is allocated.  The out of range
+        points are handled as in the `evaluate()` method of the table.
+
+        """
+        coordinates = [_buffer.doubles(points) for points in ([xs] if ys is None else [xs, ys])]
+        length = len(coordinates[0])
+        if any(len(points) != length for points in coordinates):
+            raise ValueError("xs and ys must have equal length.")
+        if out is None:
+            out = np.empty(length) if np is not None else array("d", bytes(8 * length))
+        results = memoryview(out)
+        if results.format != "d" or not results.c_contiguous or results.readonly:
+            raise ValueError("out must be a writable contiguous buffer of doubles.")
+        results = results.cast("B").cast("d")
+        if len(results) != length:
+            raise ValueError("out must have one item per point.")
+        if not length:
+            return out
+
+        bounds = _split(length, self.workers)
+        if not self.processes:
+            _run([self._executor.submit(_evaluate_into, self.table, results, coordinates,
+                                        start, stop, fill)
+                  for start, stop in bounds])
+            return out
+
+        inputs = SharedMemory(create=True, size=8 * length * len(coordinates))
+        outputs = SharedMemory(create=True, size=8 * length)
+        try:
+            view = inputs.buf.cast("d")
+            for k, points in enumerate(coordinates):
+                view[k * length:(k + 1) * length] = points
+            view.release()
+
+            _run([self._executor.submit(_evaluate_shared, inputs.name, outputs.name, length,
+                                        len(coordinates), start, stop, fill)
+                  for start, stop in bounds])
+
+            view = outputs.buf.cast("d")
+            results[:] = view[:length]
+            view.release()
+        finally:
+            for memory in (inputs, outputs):
+                memory.close()
+                memory.unlink()
+        return out
+
+
+def evaluate(table, xs, ys=None, fill=None, out=None, workers=None, processes=True):
+    """ Evaluate `table` once with a temporary `ParallelEvaluator`.  """
+    with ParallelEvaluator(table, workers, processes) as evaluator:
+        return evaluator.evaluate(xs, ys, fill, out)
+
+
+def _split(length, parts):
+    """ Return the bounds of `parts` contiguous slices of about the same length.  """
+    parts = max(min(parts, length), 1)
+    size, remainder = divmod(length, parts)
+    bounds = []
+    start = 0
+    for k in range(parts):
+        stop = start + size + (k < remainder)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _run(tasks):
+    """ Wait for all the `tasks` and then raise the first error, if any.  """
+    wait(tasks)
+    for task in tasks:
+        task.result()
+
+
+def _evaluate_into(table, results, coordinates, start, stop, fill):
+    points = [xs[start:stop] for xs in coordinates]
+    results[start:stop] = _buffer.doubles(table.evaluate(*points, fill=fill))
+
+
+def _attach(name, kind):
+    """ Map the table that was published in the shared memory block `name`.  """
+    global _table, _table_memory
+    _table_memory = SharedMemory(name=name)
+    _table = _io.CLASSES[kind]._from_state(*_io.read(_table_memory.buf, kind, name))
+
+
+def _evaluate_shared(inputs_name, outputs_name, length, count, start, stop, fill):
+    # the points are copied out of the shared memory, so that no view on it outlives this call,
+    # not even in the traceback of an exception
+    inputs = SharedMemory(name=inputs_name)
+    outputs = SharedMemory(name=outputs_name)
+    try:
+        view = inputs.buf.cast("d")
+        try:
+            coordinates = [_copy(view[k * length + start:k * length + stop]) for k in range(count)]
+        finally:
+            view.release()
+
+        results = _buffer.doubles(_table.evaluate(*coordinates, fill=fill))
+
+        view = outputs.buf.cast("d")
+        try:
+            view[start:stop] = results
+        finally:
+            view.release()
+    finally:
+        inputs.close()
+        outputs.close()
+
+
+def _copy(view):
+    """ Return a private copy of the memoryview of doubles `view`.  """
+    copy = array("d")
+    copy.frombytes(view.cast("B"))
+    return copy
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/registry.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+"""
+Registry of named interpolation tables with lazy loading and a memory budget.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from . import _io
+
+
+# the default memory budget of a registry
+MAX_BYTES = 256 * 2 ** 20
+
+
+class TableRegistry(object):
+    """
+    Tables that are built on first access and evicted when they exceed a memory budget.
+
+    Each table is registered with a name and a source, which is either a callable that builds
+    the table or the path of a file saved with `save()`.  The paths of saved tables can also be
+    used as names directly, without registering them.  The tables are built when they are first
+    requested and are kept until the `nbytes` of all the loaded tables exceed `max_bytes`, at
+    which point the least recently used ones are evicted.  The table that was requested last is
+    never evicted, even if it exceeds the budget on its own.  The size of a table is read again
+    whenever it is requested, so the caches that it builds on use, e.g. the integrals or the
+    buffers of `append()`, count towards the budget from its next request on.
+
+    The counters `hits`, `misses` and `evictions` count the requests of loaded tables, the tables
+    that were built and the tables that were evicted.  The registry can be shared by threads.  The
+    tables are built outside the lock of the registry, so a slow build does not delay the requests
+    of the other tables, and the concurrent requests of a table that is being built wait for that
+    build instead of starting their own.
+
+    """
+    __slots__ = ("max_bytes", "mmap", "nbytes", "hits", "misses", "evictions", "_sources",
+                 "_tables", "_building", "_lock")
+
+    def __init__(self, max_bytes=MAX_BYTES, mmap=True):
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._sources = {}
+        # the loaded tables and their sizes, from the least to the most recently used
+        self._tables = OrderedDict()
+        # the futures of the tables that are being built
+        self._building = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, source):
+        """
+        Register the table `name`, which is built by calling `source` or loaded from the file
+        `source`.  A loaded table of the same name is evicted.
+
+        """
+        with self._lock:
+            self._sources[name] = source
+            self.evict(name)
+
+    def get(self, name):
+        """ Return the table `name`, building it if it is not loaded.  """
+        with self._lock:
+            if name in self._tables:
+                self._tables.move_to_end(name)
+                self.hits += 1
+                table, size = self._tables[name]
+                # count the caches that the table has built since it was last requested
+                self._resize(name, table, size, table.nbytes)
+                return table
+            future = self._building.get(name)
+            building = future is None
+            if building:
+                future = self._building[name] = Future()
+                source = self._sources.get(name, name)
+            else:
+                self.hits += 1
+        if not building:
+            # another thread is building the table
+            return future.result()
+
+        try:
+            table = self._build(name, source)
+            size = _nbytes(name, table)
+        except BaseException as e:
+            with self._lock:
+                del self._building[name]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._building[name]
+            self.misses += 1
+            # a table that was registered again while it was built is not kept
+            if self._sources.get(name, name) is source:
+                self._resize(name, table, 0, size)
+        future.set_result(table)
+        return table
+
+    __getitem__ = get
+
+    def evict(self, name):
+        """ Drop the table `name` from memory, if it is loaded.  It is built again on request.  """
+        with self._lock:
+            if name in self._tables:
+                _, size = self._tables.pop(name)
+                self.nbytes -= size
+
+    def clear(self):
+        """ Drop all the loaded tables from memory.  """
+        with self._lock:
+            self._tables.clear()
+            self.nbytes = 0
+
+    def __contains__(self, name):
+        return name in self._sources or name in self._tables
+
+    def __len__(self):
+        """ Return the number of loaded tables.  """
+        return len(self._tables)
+
+    def as_dict(self):
+        """ Return the counters and the memory usage of the registry as a plain dict.  """
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "nbytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _resize(self, name, table, old, new):
+        """
+        Record the size of the loaded table `name`, which changed from `old` to `new` bytes, and
+        evict the least recently used tables while the budget is exceeded.
+
+        """
+        self._tables[name] = (table, new)
+        self.nbytes += new - old
+        while self.nbytes > self.max_bytes and len(self._tables) > 1:
+            _, (_, size) = self._tables.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def _build(self, name, source):
+        if callable(source):
+            return source()
+        if not isinstance(source, (str, bytes, os.PathLike)) or not os.path.isfile(source):
+            raise KeyError(name)
+        kind = _io.kind(source)
+        if kind not in _io.CLASSES:
+            raise ValueError("%s contains an unknown kind of table." % source)
+        return _io.CLASSES[kind].load(source, self.mmap)
+
+
+def _nbytes(name, table):
+    """ Return the size of `table`, which must have an `nbytes` like the interpolation tables.  """
+    try:
+        return table.nbytes
+    except AttributeError:
+        raise TypeError("The source of %s did not return a table with an nbytes attribute, got %s."
+                        % (name, type(table).__name__))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/service.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+"""
+Asyncio front-end of the interpolation tables.
+
+`LookupService` lets many coroutines query a table one point at a time, while the table is
+evaluated on batches: the pending lookups are collected for a short `delay`, or until there are
+`max_batch` of them, and are then evaluated with a single call to `evaluate()`.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import asyncio
+
+from .bilinear import BilinearInterpolation
+
+
+class LookupService(object):
+    """
+    Coalesce the concurrent lookups of the coroutines of an event loop into batches.
+
+    `await lookup(x)`, or `await lookup(x, y)` for a `BilinearInterpolation`, returns the same
+    value as `table(x)`.  Each lookup waits at most `delay` seconds for other lookups to join its
+    batch, and a batch is evaluated as soon as it holds `max_batch` points.  The points that are
+    out of range raise the same `ValueError` as the table, without failing the rest of the batch.
+
+    The counters `lookups` and `batches` hold the number of points and batches evaluated so far.
+
+    """
+    __slots__ = ("table", "delay", "max_batch", "lookups", "batches", "_bilinear", "_pending",
+                 "_timer")
+
+    def __init__(self, table, delay=0.0005, max_batch=1024):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1.")
+        self.table = table
+        self.delay = delay
+        self.max_batch = max_batch
+        self.lookups = 0
+        self.batches = 0
+        self._bilinear = isinstance(table, BilinearInterpolation)
+        self._pending = []
+        self._timer = None
+
+    def lookup(self, *point):
+        """ Queue a lookup of `point` and return a future that resolves to its value.  """
+        if len(point) != (2 if self._bilinear else 1):
+            raise TypeError("lookup() takes %d coordinates." % (2 if self._bilinear else 1))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((point, future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self.flush)
+        return future
+
+    def flush(self):
+        """ Evaluate the pending lookups now and resolve their futures.  """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        table = self.table
+        points = [point for point, _ in pending]
+        fill = None if table.extrapolate else float("nan")
+        try:
+            if self._bilinear:
+                results = table.evaluate([x for x, _ in points], [y for _, y in points], fill)
+            else:
+                results = table.evaluate([x for x, in points], fill)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.lookups += len(pending)
+        self.batches += 1
+
+        for point, future, result in zip(points, (future for _, future in pending), results):
+            if future.done():
+                # cancelled while waiting
+                continue
+            if result != result and fill is not None:
+                # either out of range or NaN in the table; the scalar call tells them apart
+                try:
+                    result = table(*point)
+                except ValueError as e:
+                    future.set_exception(e)
+                    continue
+            future.set_result(float(result))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file interpolation/stats.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+"""
+Opt-in usage statistics of the interpolation tables.
+
+The statistics are collected by switching the class of a table to an instrumented subclass, whose
+lookups record each query before delegating to the original ones.  Tables without statistics
+keep their original class, so the instrumentation costs nothing while it is disabled.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TableStats(object):
+    """
+    Usage statistics of a table.
+
+    `calls` counts the scalar and the batch lookups and `points` the evaluated points.  The points
+    outside the table are counted in `extrapolated` if the table extrapolates, otherwise in
+    `out_of_range`.  `intervals` maps the interval, or the `(i, j)` cell of bilinear tables, of the
+    points inside the table to the number of hits and `seconds` is the cumulative evaluation time.
+
+    """
+    __slots__ = ("calls", "points", "extrapolated", "out_of_range", "intervals", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.points = 0
+        self.extrapolated = 0
+        self.out_of_range = 0
+        self.intervals = Counter()
+        self.seconds = 0.0
+
+    def as_dict(self):
+        """ Return the statistics as a plain dict.  """
+        return {
+            "calls": self.calls,
+            "points": self.points,
+            "extrapolated": self.extrapolated,
+            "out_of_range": self.out_of_range,
+            "intervals": dict(self.intervals),
+            "seconds": self.seconds,
+        }
+
+    def record_batch(self, intervals, outside, extrapolate, columns=None):
+        """
+        Record a batch lookup given the intervals of its points and their out of range mask.  If
+        `columns` is given, the intervals are the flat indexes `j * columns + i` of `(i, j)` cells.
+
+        """
+        self.calls += 1
+        self.points += len(outside)
+        if np is not None:
+            outside = np.asarray(outside, dtype=bool)
+            missed = int(np.count_nonzero(outside))
+            keys, counts = np.unique(np.asarray(intervals)[~outside], return_counts=True)
+            keys, counts = keys.tolist(), counts.tolist()
+        else:
+            missed = sum(outside)
+            hits = Counter(i for i, out in zip(intervals, outside) if not out)
+            keys, counts = list(hits), list(hits.values())
+        if columns is not None:
+            keys = [(key % columns, key // columns) for key in keys]
+        self.intervals.update(dict(zip(keys, counts)))
+        if extrapolate:
+            self.extrapolated += missed
+        else:
+            self.out_of_range += missed
+
+
+def instrument(table, mixin):
+    """ Switch `table` to the subclass of its class that is instrumented by `mixin`.  """
+    cls = type(table)
+    if not getattr(cls, "_instrumented", False):
+        key = (cls, mixin)
+        if key not in _subclasses:
+            _subclasses[key] = type(str("Instrumented" + cls.__name__), (mixin, cls),
+                                    {"__slots__": (), "_instrumented": True, "_original": cls})
+        table.__class__ = _subclasses[key]
+    table.stats = TableStats()
+    return table.stats
+
+
+def uninstrument(table):
+    """ Switch `table` back to its original class and return its statistics.  """
+    stats = table.stats
+    if getattr(type(table), "_instrumented", False):
+        table.__class__ = type(table)._original
+    table.stats = None
+    return stats
+
+
+_subclasses = {}
@@ -41,10 +41,16 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import math
+import os
+import shutil
+import tempfile
 import unittest
 
 from nose.tools import assert_almost_equal, assert_raises
 
+from array import array
+
 from interpolation import BilinearInterpolation
 
 
@@ -92,6 +98,28 @@ def test_values_equal_length_to_y_index():
     )
 
 
+def test_values_rows_equal_length_to_x_index():
+    assert_raises(ValueError, BilinearInterpolation,
+                  x_index=(1, 2, 3), y_index=(1, 2),
+                  values=((1, 2, 3),
+                          (2, 3)))
+
+
+def test_tables_are_stored_as_doubles():
+    x_index = array("d", (1, 2, 3))
+    table = BilinearInterpolation(x_index, (1, 2), ((1, 2, 3), (2, 3, 4)))
+
+    assert table.x_index.obj is x_index
+    assert table.values.shape == (2, 3)
+    assert table.values[1, 2] == 4
+    assert not hasattr(table, "__dict__")
+
+
+def test_trusted_indexes_are_not_validated():
+    table = BilinearInterpolation((1, 2), (1, 2), ((1, 2), (3, 4)), validate=False)
+    assert table(1.5, 1.5) == 2.5
+
+
 def test_no_extrapolation():
     table = BilinearInterpolation(
         x_index=(1, 3),
@@ -121,5 +149,241 @@ def test_interpolations_table():
     assert_almost_equal(table(4, 4), 16)
 
 
+def test_rows_follow_y_index():
+    table = BilinearInterpolation(
+        x_index=(1, 2, 4),
+        y_index=(1, 3),
+        values=((1, 2, 3),
+                (2, 5, 6)),
+        extrapolate=True)
+
+    assert_almost_equal(table(2, 1), 2)
+    assert_almost_equal(table(1, 3), 2)
+    assert_almost_equal(table(3.5, 1.5), 3.5)
+
+
+def test_interpolations_without_extrapolation():
+    table = BilinearInterpolation(
+        x_index=(1, 3),
+        y_index=(1, 3),
+        values=((1, 2), (2, 3)),
+        extrapolate=False)
+
+    assert_almost_equal(table(2, 2), 2)
+    assert_almost_equal(table(3, 1.5), 2.25)
+
+
+def test_precomputed_coefficients():
+    args = dict(x_index=(1, 2, 4),
+                y_index=(1, 3, 4),
+                values=((1, 2, 3),
+                        (2, 5, 6),
+                        (3, 6, 10)))
+    table = BilinearInterpolation(**args)
+    precomputed = BilinearInterpolation(precompute=True, **args)
+
+    assert len(precomputed.coefficients) == 4 * 2 * 2
+    for x in (0, 1, 1.5, 2, 3.5, 4, 5):
+        for y in (0, 1, 2, 3.5, 4, 5):
+            assert_almost_equal(precomputed(x, y), table(x, y))
+
+    precomputed = BilinearInterpolation(precompute=True, extrapolate=False, **args)
+    assert_raises(ValueError, precomputed, 0, 2)
+    assert_raises(ValueError, precomputed, 2, 5)
+
+
+def test_evaluate_matches_scalar_calls():
+    table = BilinearInterpolation(
+        x_index=(1, 2, 4),
+        y_index=(1, 3, 4),
+        values=((1, 2, 3),
+                (2, 5, 6),
+                (3, 6, 10)),
+        extrapolate=True)
+
+    xs = (0, 1, 1.5, 2, 3.5, 4, 5, 2.5)
+    ys = (0, 1, 3.5, 2, 1.5, 4, 5, 4.5)
+    for x, y, result in zip(xs, ys, table.evaluate(xs, ys)):
+        assert_almost_equal(result, table(x, y))
+
+    grid = table.evaluate_grid(xs, ys)
+    for row, y in zip(grid, ys):
+        for result, x in zip(row, xs):
+            assert_almost_equal(result, table(x, y))
+
+
+def test_uniform_axes():
+    values = ((1, 2, 3),
+              (2, 5, 6),
+              (3, 6, 10))
+    table = BilinearInterpolation.uniform(1, 0.5, 0, 2, values)
+    assert (table.x_step, table.y_step) == (0.5, 2)
+    assert BilinearInterpolation((1, 2, 4), (0, 2, 4), values).x_step is None
+
+    xs = (0, 1, 1.25, 1.5, 1.75, 2, 3)
+    ys = (-1, 0, 1, 2, 3, 4, 5)
+    for x, y, result in zip(xs, ys, table.evaluate(xs, ys)):
+        assert_almost_equal(result, table(x, y))
+    assert_almost_equal(table(1.75, 3), 6.75)
+
+    result = table.evaluate((float("nan"), 1.5), (1, float("nan")))
+    assert all(math.isnan(value) for value in result)
+
+
+def test_evaluate_no_extrapolation():
+    table = BilinearInterpolation(
+        x_index=(1, 3),
+        y_index=(1, 3),
+        values=((1, 2), (2, 3)),
+        extrapolate=False)
+
+    assert_raises(ValueError, table.evaluate, (2, 0), (2, 2))
+    assert_raises(ValueError, table.evaluate_grid, (2, 3), (2, 4))
+
+    assert list(table.evaluate((2, 0, 2), (2, 2, 4), fill=-1)) == [2, -1, -1]
+    assert [list(row) for row in table.evaluate_grid((0, 2), (2, 4), fill=-1)] == [[-1, 2], [-1, -1]]
+
+
+def test_evaluate_rejects_single_numbers():
+    table = BilinearInterpolation((1, 2), (1, 2), ((1, 2), (3, 4)))
+    for method in (table.evaluate, table.evaluate_grid, table.value_and_grad_many):
+        assert_raises(TypeError, method, 1.5, 1.5)
+
+
+def test_nan_is_out_of_range():
+    nan = float("nan")
+    table = BilinearInterpolation(
+        x_index=(1, 3),
+        y_index=(1, 3),
+        values=((1, 2), (2, 3)),
+        extrapolate=False)
+    assert_raises(ValueError, table, nan, 2)
+    assert_raises(ValueError, table, 2, nan)
+    assert_raises(ValueError, table.evaluate, (nan, 2), (2, 2))
+    assert list(table.evaluate((nan, 2, 2), (2, nan, 2), fill=-1)) == [-1, -1, 2]
+    assert list(table.stream([(nan, 2), (2, 2)], out_of_range="skip")) == [2]
+
+
+def test_stream():
+    table = BilinearInterpolation(
+        x_index=(1, 3),
+        y_index=(1, 3),
+        values=((1, 2), (2, 3)),
+        extrapolate=False)
+
+    points = [(2, 2), (0, 2), (3, 1.5), (2, 4)] * 3
+    assert list(table.stream(iter(points), chunk_size=5, out_of_range="skip")) == [2, 2.25] * 3
+    results = table.stream(iter(points), chunk_size=2, out_of_range="sentinel", sentinel=-1)
+    assert list(results) == [2, -1, 2.25, -1] * 3
+    assert_raises(ValueError, list, table.stream(iter(points)))
+
+
+def test_save_and_load():
+    args = dict(x_index=(1, 2, 4),
+                y_index=(1, 3),
+                values=((1, 2, 3),
+                        (2, 5, 6)))
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "table.bin")
+        for precompute in (False, True):
+            table = BilinearInterpolation(precompute=precompute, **args)
+            table.save(path)
+            for mmap in (True, False):
+                loaded = BilinearInterpolation.load(path, mmap=mmap)
+                assert loaded.values.tolist() == table.values.tolist()
+                assert (loaded.coefficients is None) == (not precompute)
+                assert loaded(3.5, 1.5) == table(3.5, 1.5)
+                assert list(loaded.evaluate((0, 5), (2, 2))) == list(table.evaluate((0, 5), (2, 2)))
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_stats():
+    table = BilinearInterpolation(
+        x_index=(1, 2, 4),
+        y_index=(1, 3),
+        values=((1, 2, 3),
+                (2, 5, 6)),
+        extrapolate=True)
+
+    stats = table.enable_stats()
+    assert_almost_equal(table(3.5, 1.5), 3.5)
+    table(5, 2)
+    table.evaluate((1.5, 3, 0), (2, 2, 2))
+
+    exported = stats.as_dict()
+    assert exported["calls"] == 3
+    assert exported["points"] == 5
+    assert exported["extrapolated"] == 2
+    assert exported["intervals"] == {(1, 0): 2, (0, 0): 1}
+
+    table.disable_stats()
+    assert type(table) is BilinearInterpolation
+
+
+def test_compile():
+    table = BilinearInterpolation(
+        x_index=(1, 2.3, 4),
+        y_index=(1, 3.7, 4),
+        values=((1, 2, 3),
+                (2, 5, 6),
+                (3, 6, 10)),
+        extrapolate=False,
+        precompute=True)
+
+    compiled, error = table.compile(max_error=0.01)
+    assert compiled.x_step is not None and compiled.y_step is not None
+    assert compiled.coefficients is not None
+    assert 0 < error <= 0.01
+    for x in (1.1, 2.3, 3.9):
+        for y in (1.5, 3.7, 3.95):
+            assert abs(compiled(x, y) - table(x, y)) <= error + 1e-12
+    assert_raises(ValueError, compiled, 0, 2)
+
+    assert table.compile(max_error=0.01, max_bytes=1000) == (table, 0.0)
+
+    # 0.2 + 0.7 and 0.1 + 5 * 0.04 round below the last points, which the compiled table covers
+    table = BilinearInterpolation(
+        x_index=(0.2, 0.9),
+        y_index=(0.1, 0.12, 0.15, 0.2, 0.25, 0.3),
+        values=[(k, 2 * k) for k in range(6)],
+        extrapolate=False)
+    compiled, error = table.compile(max_error=10)
+    assert compiled.x_index[-1] == 0.9 and compiled.y_index[-1] == 0.3
+    assert abs(compiled(0.9, 0.3) - table(0.9, 0.3)) <= error
+
+
+def test_value_and_grad():
+    for precompute in (False, True):
+        table = BilinearInterpolation(
+            x_index=(1, 2, 4),
+            y_index=(1, 3, 4),
+            values=((1, 2, 3),
+                    (2, 5, 6),
+                    (3, 6, 10)),
+            precompute=precompute)
+
+        value, (dzdx, dzdy) = table.value_and_grad(2.5, 3.5)
+        assert_almost_equal(value, table(2.5, 3.5))
+        h = 1e-6
+        assert_almost_equal(dzdx, (table(2.5 + h, 3.5) - table(2.5 - h, 3.5)) / (2 * h), places=5)
+        assert_almost_equal(dzdy, (table(2.5, 3.5 + h) - table(2.5, 3.5 - h)) / (2 * h), places=5)
+
+        points = [(2.5, 3.5), (1.5, 2), (0, 5)]
+        values, (xs_grad, ys_grad) = table.value_and_grad_many(*zip(*points))
+        for k, (x, y) in enumerate(points):
+            value, (dzdx, dzdy) = table.value_and_grad(x, y)
+            assert_almost_equal(values[k], value)
+            assert_almost_equal(xs_grad[k], dzdx)
+            assert_almost_equal(ys_grad[k], dzdy)
+
+    table = BilinearInterpolation((1, 2), (1, 2), ((1, 2), (3, 4)), extrapolate=False)
+    assert_raises(ValueError, table.value_and_grad, 0, 1.5)
+    values, (dzdx, dzdy) = table.value_and_grad_many((1.5, 0), (1.5, 1.5), fill=-1)
+    assert list(values) == [2.5, -1] and list(dzdx) == [1, -1] and list(dzdy) == [2, -1]
+
+
 if __name__ == "__main__":
     unittest.main()
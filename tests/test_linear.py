@@ -41,11 +41,19 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import math
+import random
+import os
+import shutil
+import tempfile
 import unittest
 
 from nose.tools import assert_almost_equal, assert_raises
 
-from interpolation import LinearInterpolation
+from array import array
+from bisect import bisect_left
+
+from interpolation import LinearInterpolation, LinearSeriesInterpolation
 
 
 def test_zero_length_raises_an_error():
@@ -65,6 +73,29 @@ def test_x_array_in_strictly_ascending_order():
     assert_raises(ValueError, LinearInterpolation, (1, 1, 2), (2, 3, 4))
 
 
+def test_tables_are_stored_as_doubles():
+    x_index = array("d", (1, 2, 3))
+    table = LinearInterpolation(x_index, (10, 20, 30))
+
+    assert table.x_index.obj is x_index
+    assert table.values.format == table.slopes.format == "d"
+    assert list(table.slopes) == [10, 10]
+    assert not hasattr(table, "__dict__")
+
+
+def test_short_tables_are_looked_up_in_lists():
+    table = LinearInterpolation((1, 2, 3), (10, 20, 30), extrapolate=False)
+    assert all(isinstance(data, list) for data in table._lookup)
+    assert table(2.5) == 25
+
+    # the changes of live tables are looked up in the buffers
+    table.update(1, 40)
+    assert table._lookup[0] is table.x_index
+    assert table(2.5) == 35
+    table.append(4, 20)
+    assert table(3.5) == 25
+
+
 def test_no_extrapolation():
     table = LinearInterpolation(
         x_index=(1, 2, 3.4, 5.8, 6, 8),
@@ -90,5 +121,369 @@ def test_interpolations_table():
     assert_almost_equal(table(10), 8)
 
 
+def test_evaluate_matches_scalar_calls():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3.4, 5.8, 6, 8),
+        values=(2, 4, 5.8, 4.3, 4, 6),
+        extrapolate=True)
+
+    xs = (0, 1, 1.5, 2, 2.7, 4, 5.9, 8, 10)
+    for inputs in (xs, list(xs), array("d", xs)):
+        for x, result in zip(xs, table.evaluate(inputs)):
+            assert_almost_equal(result, table(x))
+
+
+def test_evaluate_no_extrapolation():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3),
+        values=(10, 20, 30),
+        extrapolate=False)
+
+    assert_raises(ValueError, table.evaluate, (1.5, 4))
+    assert_raises(ValueError, table.evaluate, (0, 1.5))
+
+    results = list(table.evaluate((0, 1.5, 2.5, 4), fill=-1))
+    assert results == [-1, 15, 25, -1]
+
+
+def test_evaluate_rejects_single_numbers():
+    table = LinearInterpolation((1, 2, 3), (10, 20, 30))
+    for method in (table.evaluate, table.resample, table.inverse_many, table.value_and_grad_many):
+        assert_raises(TypeError, method, 2.5)
+    assert_raises(TypeError, table.integrate_many, 1.5, 2.5)
+
+
+def test_uniform_spacing_is_detected():
+    assert_almost_equal(LinearInterpolation((0, 0.1, 0.2, 0.3), (1, 2, 3, 4)).step, 0.1)
+    assert LinearInterpolation.uniform(1, 0.5, (1, 2, 3, 4)).step == 0.5
+    assert LinearInterpolation((0, 0.1, 0.25, 0.3), (1, 2, 3, 4)).step is None
+
+
+def test_uniform_lookup_matches_binary_search():
+    length = 100000
+    table = LinearInterpolation.uniform(-5, 0.1, [k % 7 for k in range(length)], extrapolate=False)
+    assert table.step is not None
+
+    last = table.x_index[-1]
+    xs = (-5, -4.95, -4.9, 0, 0.1, 0.15, 123.4, 123.45, last - 0.05, last)
+    for x in xs:
+        assert table._search(table.x_index, x) == bisect_left(table.x_index, x)
+    assert_raises(ValueError, table, -5.05)
+    assert_raises(ValueError, table, last + 0.05)
+
+    for x, result in zip(xs[1:], table.evaluate(xs[1:])):
+        assert_almost_equal(result, table(x))
+
+
+def test_uniform_lookup_of_nan():
+    nan = float("nan")
+    for length in (10, 100000):
+        index = [float(k) for k in range(length)]
+        uniform = LinearInterpolation.uniform(0, 1, index)
+        searched = LinearInterpolation(index, index)
+        searched.step = None
+        assert uniform._search(uniform.x_index, nan) == bisect_left(uniform.x_index, nan)
+        assert math.isnan(uniform(nan))
+        for table in (uniform, searched):
+            result = table.evaluate([nan, 1.5])
+            assert math.isnan(result[0]) and result[1] == 1.5
+
+
+def test_nan_is_out_of_range():
+    nan = float("nan")
+    table = LinearInterpolation((1, 2, 3), (10, 20, 30), extrapolate=False)
+    assert_raises(ValueError, table, nan)
+    assert_raises(ValueError, table.evaluate, [nan, 1.5])
+    assert list(table.evaluate([nan, 1.5], fill=-1)) == [-1, 15]
+    assert list(table.stream([nan, 1.5], out_of_range="skip")) == [15]
+    assert_raises(ValueError, table.integrate, nan, 2)
+    assert_raises(ValueError, table.integrate_many, [nan], [2])
+    assert list(table.integrate_many([nan, 1], [2, 2], fill=-1)) == [-1, 15]
+
+
+def test_cursor_matches_table():
+    x_index = [k + random.random() / 2 for k in range(200)]
+    table = LinearInterpolation(x_index, [random.random() for x in x_index])
+    cursor = table.cursor()
+
+    # sorted queries, random jumps in both directions and the exact index points
+    xs = sorted(random.uniform(-10, 210) for k in range(500))
+    xs += [random.uniform(-10, 210) for k in range(500)]
+    xs += x_index + x_index[::-7]
+    for x in xs:
+        assert_almost_equal(cursor(x), table(x))
+        assert cursor.position == bisect_left(x_index, x)
+
+
+def test_resample():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3.4, 5.8, 6, 8),
+        values=(2, 4, 5.8, 4.3, 4, 6),
+        extrapolate=False)
+
+    xs = (1.5, 2, 2, 2.7, 4, 5.9, 8)
+    for x, result in zip(xs, table.resample(xs)):
+        assert_almost_equal(result, table(x))
+
+    assert list(table.resample((0, 1.5, 6, 9), fill=-1)) == [-1, 3, 4, -1]
+    assert_raises(ValueError, table.resample, (0, 1.5))
+    assert_raises(ValueError, table.resample, (2, 1.5))
+
+
+def test_stream():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3),
+        values=(10, 20, 30),
+        extrapolate=False)
+
+    def points():
+        for k in range(10):
+            yield 1.5
+            yield 4
+
+    assert list(table.stream(iter([1.5, 2.5] * 5), chunk_size=3)) == [15, 25] * 5
+    assert list(table.stream(points(), chunk_size=3, out_of_range="skip")) == [15] * 10
+    assert list(table.stream(points(), chunk_size=4, out_of_range="sentinel")) == [15, None] * 10
+    assert_raises(ValueError, list, table.stream(points()))
+    assert_raises(ValueError, table.stream, points(), out_of_range="ignore")
+
+
+def test_save_and_load():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3.4, 5.8, 6, 8),
+        values=(2, 4, 5.8, 4.3, 4, 6),
+        extrapolate=False)
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "table.bin")
+        table.save(path)
+        for mmap in (True, False):
+            loaded = LinearInterpolation.load(path, mmap=mmap)
+            assert list(loaded.x_index) == list(table.x_index)
+            assert list(loaded.slopes) == list(table.slopes)
+            assert loaded.step is None and loaded.extrapolate is False
+            assert loaded(2.7) == table(2.7)
+            assert_raises(ValueError, loaded, 10)
+
+        LinearInterpolation.uniform(0, 0.5, (1, 2, 3)).save(path)
+        assert LinearInterpolation.load(path).step == 0.5
+
+        with open(path, "wb") as f:
+            f.write(b"not a table")
+        assert_raises(ValueError, LinearInterpolation.load, path)
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_series_match_single_tables():
+    x_index = (1, 2, 3.4, 5.8, 6, 8)
+    columns = ((2, 4, 5.8, 4.3, 4, 6),
+               (0, 1, 0, -1, 0, 1),
+               (5, 5, 5, 5, 5, 6))
+    series = LinearSeriesInterpolation(x_index, list(zip(*columns)))
+    tables = [LinearInterpolation(x_index, column) for column in columns]
+    assert series.columns == 3
+
+    xs = (0, 1, 2.7, 4, 5.9, 8, 10)
+    for x, row in zip(xs, series.evaluate(xs)):
+        assert len(series(x)) == len(row) == 3
+        for table, single, result in zip(tables, series(x), row):
+            assert_almost_equal(single, table(x))
+            assert_almost_equal(result, table(x))
+
+
+def test_series_no_extrapolation():
+    series = LinearSeriesInterpolation((1, 2, 3), ((10, 1), (20, 2), (30, 3)), extrapolate=False)
+
+    assert list(series(1.5)) == [15, 1.5]
+    assert_raises(ValueError, series, 0)
+    assert_raises(ValueError, series.evaluate, (0, 1.5))
+    assert [list(row) for row in series.evaluate((0, 2.5), fill=-1)] == [[-1, -1], [25, 2.5]]
+    assert_raises(ValueError, LinearSeriesInterpolation, (1, 2), ((1, 2), (3,)))
+    assert_raises(ValueError, LinearSeriesInterpolation, (1, 2, 3), ((1, 2), (3, 4)))
+
+
+def test_stats():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3),
+        values=(10, 20, 30),
+        extrapolate=False)
+    assert table.stats is None
+
+    stats = table.enable_stats()
+    assert type(table) is not LinearInterpolation and isinstance(table, LinearInterpolation)
+    assert table(1.5) == 15
+    assert table(1.7) == 17
+    assert_raises(ValueError, table, 4)
+    assert list(table.evaluate((1.5, 2.5, 0), fill=-1)) == [15, 25, -1]
+
+    exported = stats.as_dict()
+    assert exported["calls"] == 4
+    assert exported["points"] == 6
+    assert exported["out_of_range"] == 2
+    assert exported["extrapolated"] == 0
+    assert exported["intervals"] == {0: 3, 1: 1}
+    assert exported["seconds"] > 0
+
+    assert table.disable_stats() is stats
+    assert type(table) is LinearInterpolation and table.stats is None
+    assert table(2.5) == 25
+
+
+def test_compile():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3.4, 5.8, 6, 8),
+        values=(2, 4, 5.8, 4.3, 4, 6))
+
+    compiled, error = table.compile(max_error=0.01)
+    assert compiled.step is not None
+    assert 0 < error <= 0.01
+    for x in (0, 1.3, 2.2, 3.4, 5.9, 7.5, 10):
+        assert abs(compiled(x) - table(x)) <= error + 1e-12
+
+    # the error is exact, since it is measured at the breakpoints of the table
+    assert_almost_equal(error, max(abs(compiled(x) - table(x)) for x in table.x_index))
+
+    # a budget that cannot meet the error bound falls back to the original table
+    assert table.compile(max_error=0.01, max_bytes=1000) == (table, 0.0)
+    assert_raises(ValueError, table.compile, -1)
+
+    # 0.1 + 5 * 0.04 rounds below 0.3, but the compiled table still covers the last point
+    table = LinearInterpolation((0.1, 0.12, 0.15, 0.2, 0.25, 0.3), (1, 2, 4, 3, 5, 6),
+                                extrapolate=False)
+    compiled, error = table.compile(max_error=10)
+    assert compiled.step is not None and compiled.x_index[-1] == 0.3
+    assert abs(compiled(0.3) - table(0.3)) <= error
+
+
+def test_append_and_update():
+    x_index = array("d", (1, 2, 3))
+    table = LinearInterpolation(x_index, (10, 20, 30))
+    for x in range(4, 20):
+        table.append(x, 10 * x)
+    assert table.length == 19
+    assert table.step == 1
+    assert table(18.5) == 185
+    assert list(table.evaluate((0.5, 10.5))) == [5, 105]
+
+    table.update(4, 0)
+    assert table(4.5) == 20 and table(5.5) == 30
+    assert_raises(IndexError, table.update, 19, 0)
+    # the original buffers are not modified
+    assert list(x_index) == [1, 2, 3]
+
+    table.append(20.5, 0)
+    assert table.step is None
+    assert_raises(ValueError, table.append, 20.5, 0)
+
+
+def test_sliding_window():
+    table = LinearInterpolation((1, 2, 3), (1, 4, 9), window=3)
+    cursor = table.cursor()
+    for x in range(4, 12):
+        table.append(x, x * x)
+        assert table.length == 3
+        assert table(x - 0.5) == cursor(x - 0.5) == ((x - 1) ** 2 + x ** 2) / 2
+    assert list(table.x_index) == [9, 10, 11]
+    assert list(table.slopes) == [19, 21]
+    assert_raises(ValueError, LinearInterpolation, (1, 2, 3), (1, 4, 9), window=2)
+
+
+def test_lazy_slopes():
+    table = LinearInterpolation((1, 2, 4, 5), (1, 3, 4, 6), lazy=True)
+    assert table(3) == 3.5
+    assert table(6) == 8
+    assert list(table.evaluate((0, 1.5, 4.5))) == [-1, 2, 5]
+    assert table.cursor()(4.5) == 5
+
+    table.update(1, 2)
+    assert list(table.slopes) == [1, 1, 2]
+
+
+def test_trusted_index_is_not_validated():
+    assert_raises(ValueError, LinearInterpolation, (1, 3, 2), (1, 2, 3))
+    table = LinearInterpolation((1, 2, 3), (1, 2, 3), validate=False)
+    assert table(2.5) == 2.5
+
+
+def test_inverse():
+    table = LinearInterpolation((1, 2, 4), (10, 5, 4))
+    assert table.inverse(7.5) == 1.5
+    assert table.inverse(4.5) == 3
+    assert_almost_equal(table.inverse(12), 0.6)
+    assert list(table.inverse_many((7.5, 4.5, 3))) == [1.5, 3, 6]
+
+    table.update(0, 20)
+    assert table.inverse(12.5) == 1.5
+
+    table = LinearInterpolation((1, 2, 4), (1, 5, 6), extrapolate=False)
+    assert table.inverse(3) == 1.5
+    assert_raises(ValueError, table.inverse, 7)
+    assert list(table.inverse_many((3, 7, 5.5), fill=-1)) == [1.5, -1, 3]
+
+    table = LinearInterpolation((1, 2, 4), (1, 5, 5))
+    assert_raises(ValueError, table.inverse, 3)
+
+
+def test_integrate():
+    table = LinearInterpolation((1, 2, 4), (0, 2, 0))
+    assert table.integrate(1, 4) == 3
+    assert table.integrate(1.5, 3) == 2.25
+    assert table.integrate(4, 1) == -3
+    # the extrapolated lines are integrated too
+    assert table.integrate(0, 5) == 1.5
+    assert list(table.integrate_many((1, 0, 1.5), (4, 5, 3))) == [3, 1.5, 2.25]
+
+    table.append(5, 2)
+    assert table.integrate(1, 5) == 4
+
+    table = LinearInterpolation((1, 2, 4), (0, 2, 0), extrapolate=False)
+    assert table.integrate(1, 4) == 3
+    assert_raises(ValueError, table.integrate, 0, 4)
+    assert list(table.integrate_many((1, 0), (4, 4), fill=-1)) == [3, -1]
+    assert_raises(ValueError, table.integrate_many, (1, 0), (4, 4))
+
+
+def test_value_and_grad():
+    table = LinearInterpolation((1, 2, 4), (0, 2, 0))
+    assert table.value_and_grad(1.5) == (1, 2)
+    assert table.value_and_grad(3) == (1, -1)
+    # the extrapolated lines have the slopes of the edge intervals
+    assert table.value_and_grad(0) == (-2, 2)
+    assert table.value_and_grad(5) == (-1, -1)
+
+    values, slopes = table.value_and_grad_many((1.5, 3, 0, 5))
+    assert list(values) == [1, 1, -2, -1]
+    assert list(slopes) == [2, -1, 2, -1]
+
+    table = LinearInterpolation((1, 2, 4), (0, 2, 0), extrapolate=False)
+    assert_raises(ValueError, table.value_and_grad, 5)
+    values, slopes = table.value_and_grad_many((1.5, 5), fill=-1)
+    assert list(values) == [1, -1] and list(slopes) == [2, -1]
+
+
+def test_edges_are_shared():
+    # the bounds are handled alike by the lookups, the gradients, the cursors and the statistics
+    points = (0, 1, 4, 5)
+    table = LinearInterpolation((1, 2, 4), (0, 2, 0))
+    cursor = table.cursor()
+    for x in points:
+        assert table.value_and_grad(x)[0] == table(x) == cursor(x)
+    stats = table.enable_stats()
+    for x in points:
+        table(x)
+    assert stats.extrapolated == 3 and stats.intervals == {1: 1}
+
+    table = LinearInterpolation((1, 2, 4), (0, 2, 0), extrapolate=False)
+    cursor = table.cursor()
+    stats = table.enable_stats()
+    for x in (1, 5):
+        assert_raises(ValueError, table, x)
+        assert_raises(ValueError, table.value_and_grad, x)
+        assert_raises(ValueError, cursor, x)
+    assert stats.out_of_range == 2 and stats.calls == 2
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file tests/test_multilinear.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Test MultilinearInterpolation.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import itertools
+import unittest
+
+from nose.tools import assert_almost_equal, assert_raises
+
+from interpolation import BilinearInterpolation, MultilinearInterpolation
+
+
+def multilinear_function(x, y, z):
+    # multilinear functions are reproduced exactly, including the extrapolation
+    return 3 + 2 * x - y + 0.5 * z + x * y - 2 * y * z + x * y * z
+
+
+INDEXES = ((0, 1, 3), (-1, 0.5, 2, 4), (1, 2))
+VALUES = [[[multilinear_function(x, y, z) for z in INDEXES[2]] for y in INDEXES[1]]
+          for x in INDEXES[0]]
+
+
+def test_invalid_tables_raise_an_error():
+    assert_raises(ValueError, MultilinearInterpolation, (), ())
+    assert_raises(ValueError, MultilinearInterpolation, ((1,), (1, 2)), ((1, 2),))
+    assert_raises(ValueError, MultilinearInterpolation, ((1, 2), (2, 1)), ((1, 2), (3, 4)))
+    assert_raises(ValueError, MultilinearInterpolation, ((1, 2), (1, 2)), ((1, 2), (3, 4, 5)))
+    assert_raises(ValueError, MultilinearInterpolation, ((1, 2), (1, 2)), ((1, 2),))
+
+
+def test_interpolations_table():
+    table = MultilinearInterpolation(INDEXES, VALUES)
+    assert table.shape == (3, 4, 2)
+
+    points = itertools.product((-1, 0, 0.5, 2.5, 3, 4), (-2, 0, 1, 4, 5), (0, 1, 1.5, 3))
+    for point in points:
+        assert_almost_equal(table(*point), multilinear_function(*point))
+    assert_raises(ValueError, table, 1, 2)
+
+
+def test_matches_bilinear():
+    x_index, y_index = (1, 2, 4), (1, 3, 4)
+    values = ((1, 2, 3),
+              (2, 5, 6),
+              (3, 6, 10))
+    bilinear = BilinearInterpolation(x_index, y_index, values)
+    table = MultilinearInterpolation((y_index, x_index), values)
+
+    for x, y in itertools.product((0, 1.5, 3.5, 5), (0, 2, 3.5, 5)):
+        assert_almost_equal(table(y, x), bilinear(x, y))
+
+
+def test_evaluate():
+    table = MultilinearInterpolation(INDEXES, VALUES, extrapolate=False)
+
+    points = [(0.5, 1, 1.5), (2.5, -0.5, 1.2), (3, 4, 2), (-1, 0, 1.5), (1, 1, 3)]
+    xs, ys, zs = zip(*points)
+    results = table.evaluate((xs, ys, zs), fill=-1)
+    for point, result in zip(points[:3], results):
+        assert_almost_equal(result, multilinear_function(*point))
+    assert list(results[3:]) == [-1, -1]
+    assert_raises(ValueError, table.evaluate, (xs, ys, zs))
+    assert_raises(ValueError, table, -1, 0, 1.5)
+    assert_raises(TypeError, table.evaluate, (0.5, 1, 1.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
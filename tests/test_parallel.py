@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file tests/test_parallel.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Test ParallelEvaluator.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import unittest
+from array import array
+
+from nose.tools import assert_almost_equal, assert_raises
+
+from interpolation import BilinearInterpolation, LinearInterpolation
+from interpolation.parallel import ParallelEvaluator, evaluate
+
+
+def test_linear():
+    table = LinearInterpolation(
+        x_index=(1, 2, 3.4, 5.8, 6, 8),
+        values=(2, 4, 5.8, 4.3, 4, 6),
+        extrapolate=True)
+
+    xs = [k / 10 for k in range(-10, 100)]
+    for processes in (True, False):
+        with ParallelEvaluator(table, workers=3, processes=processes) as evaluator:
+            out = array("d", bytes(8 * len(xs)))
+            assert evaluator.evaluate(xs, out=out) is out
+            for x, result in zip(xs, out):
+                assert_almost_equal(result, table(x))
+            assert_raises(ValueError, evaluator.evaluate, xs, out=array("d", [0]))
+            # the buffers of other types are rejected, even if they have the right size
+            assert_raises(ValueError, evaluator.evaluate, xs, out=array("q", bytes(8 * len(xs))))
+            assert_raises(ValueError, evaluator.evaluate, xs, out=array("f", bytes(8 * len(xs))))
+            assert_raises(ValueError, evaluator.evaluate, xs, out=bytes(8 * len(xs)))
+
+
+def test_bilinear():
+    table = BilinearInterpolation(
+        x_index=(1, 3),
+        y_index=(1, 3),
+        values=((1, 2), (2, 3)),
+        extrapolate=False)
+
+    xs, ys = (2, 0, 3, 2.5), (2, 2, 1.5, 1)
+    for processes in (True, False):
+        results = evaluate(table, xs, ys, fill=-1, workers=2, processes=processes)
+        assert list(results) == [2, -1, 2.25, -1]
+        assert_raises(ValueError, evaluate, table, xs, ys, workers=2, processes=processes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file tests/test_registry.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Test TableRegistry.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from nose.tools import assert_raises
+
+from interpolation import (BilinearInterpolation, LinearInterpolation,
+                           LinearSeriesInterpolation, MultilinearInterpolation)
+from interpolation.registry import TableRegistry
+
+
+def linear_table(offset):
+    return LinearInterpolation([float(k) for k in range(100)],
+                               [float(k + offset) for k in range(100)])
+
+
+# room for two tables, but not for the integrals of one of them too
+MAX_BYTES = 2 * linear_table(0).nbytes + 400
+
+
+def test_lazy_loading_and_eviction():
+    built = []
+
+    def factory(offset):
+        def build():
+            built.append(offset)
+            return linear_table(offset)
+        return build
+
+    registry = TableRegistry(max_bytes=MAX_BYTES)
+    for offset in range(3):
+        registry.register("table-%d" % offset, factory(offset))
+    assert built == [] and len(registry) == 0
+    assert "table-0" in registry and "table-3" not in registry
+
+    assert registry["table-0"](1.5) == 1.5
+    assert registry["table-1"](1.5) == 2.5
+    assert registry.get("table-0") is registry.get("table-0")
+    assert built == [0, 1]
+    assert registry.nbytes == 2 * linear_table(0).nbytes
+
+    # table-1 is the least recently used one
+    assert registry["table-2"](1.5) == 3.5
+    assert len(registry) == 2
+    assert registry["table-0"](1.5) == 1.5
+    assert registry["table-1"](1.5) == 2.5
+    assert built == [0, 1, 2, 1]
+    assert registry.as_dict() == {"tables": 2, "nbytes": registry.nbytes,
+                                  "hits": 3, "misses": 4, "evictions": 2}
+
+    assert_raises(KeyError, registry.get, "table-3")
+
+
+def test_oversized_table_is_kept():
+    registry = TableRegistry(max_bytes=100)
+    registry.register("table", lambda: linear_table(0))
+    registry.register("other", lambda: linear_table(1))
+    assert registry["table"](1.5) == 1.5
+    assert registry["other"](1.5) == 2.5
+    assert len(registry) == 1 and registry.evictions == 1
+
+
+def test_sizes_are_updated_on_request():
+    registry = TableRegistry(max_bytes=MAX_BYTES)
+    registry.register("table-0", lambda: linear_table(0))
+    registry.register("table-1", lambda: linear_table(1))
+    registry["table-0"].integrate(1, 2)
+    registry["table-1"]
+    assert registry.nbytes == 2 * linear_table(0).nbytes and len(registry) == 2
+
+    # the cached integrals of table-0 are counted when it is requested again
+    table = registry["table-0"]
+    assert registry.nbytes == table.nbytes
+    assert len(registry) == 1 and "table-1" not in registry._tables
+
+
+def test_builds_do_not_block_other_tables():
+    started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def slow():
+        builds.append("slow")
+        started.set()
+        assert release.wait(5)
+        return linear_table(1)
+
+    registry = TableRegistry()
+    registry.register("fast", lambda: linear_table(0))
+    registry.register("slow", slow)
+    assert registry["fast"](1.5) == 1.5
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry["slow"](1.5)))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    # the hits of the other tables do not wait for the build
+    assert registry["fast"](1.5) == 1.5
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [2.5, 2.5, 2.5]
+    assert builds == ["slow"]
+    assert registry.misses == 2 and registry.hits == 3
+
+
+def test_failed_builds_are_not_cached():
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise IOError("unavailable")
+
+    registry = TableRegistry()
+    registry.register("broken", broken)
+    assert_raises(IOError, registry.get, "broken")
+    assert_raises(IOError, registry.get, "broken")
+    assert len(calls) == 2 and len(registry) == 0
+
+
+def test_tables_without_nbytes_are_rejected():
+    started, release = threading.Event(), threading.Event()
+
+    def untyped():
+        started.set()
+        assert release.wait(5)
+        return {"x_index": (1, 2)}
+
+    registry = TableRegistry()
+    registry.register("untyped", untyped)
+    registry.register("series", lambda: LinearSeriesInterpolation((1, 2), ((1, 2), (3, 4))))
+    registry.register("multilinear", lambda: MultilinearInterpolation(((1, 2),), (1, 2)))
+
+    errors = []
+
+    def wait():
+        try:
+            registry.get("untyped")
+        except TypeError as e:
+            errors.append(e)
+
+    builder = threading.Thread(target=wait)
+    builder.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    release.set()
+    builder.join(5)
+    waiter.join(5)
+    # the requests that wait for the build get its error too
+    assert len(errors) == 2 and len(registry) == 0
+
+    # all the interpolation classes report their size
+    assert registry["series"](1.5)[0] == 2
+    assert registry["multilinear"](1.5) == 1.5
+    assert len(registry) == 2 and registry.nbytes > 0
+
+
+class TestFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_files(self):
+        linear = os.path.join(self.directory, "linear.bin")
+        bilinear = os.path.join(self.directory, "bilinear.bin")
+        linear_table(0).save(linear)
+        BilinearInterpolation((1, 2), (1, 2), ((1, 2), (3, 4))).save(bilinear)
+
+        registry = TableRegistry()
+        registry.register("surface", bilinear)
+        assert registry["surface"](1.5, 1.5) == 2.5
+        # paths work as names without registering them
+        assert registry[linear](1.5) == 1.5
+        assert registry.misses == 2
+
+        registry.clear()
+        assert len(registry) == 0 and registry.nbytes == 0
+        assert registry["surface"](1.5, 1.5) == 2.5
+        assert registry.misses == 3
+
+
+if __name__ == "__main__":
+    unittest.main()
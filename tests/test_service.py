@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# file tests/test_service.py
+#
+#############################################################################
+# Copyright (c) 2013 by Panagiotis Mavrogiorgos
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name(s) of the copyright holders nor the names of its
+#   contributors may be used to endorse or promote products derived from this
+#   software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AS IS AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO
+# EVENT SHALL THE COPYRIGHT HOLDERS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#############################################################################
+#
+# @license: http://opensource.org/licenses/BSD-3-Clause
+# @authors: see AUTHORS.txt
+
+""" Test LookupService.  """
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import asyncio
+import time
+import unittest
+
+from nose.tools import assert_raises
+
+from interpolation import BilinearInterpolation, LinearInterpolation
+from interpolation.service import LookupService
+
+
+def test_lookups_are_coalesced():
+    table = LinearInterpolation((1, 2, 3), (10, 20, 30))
+    service = LookupService(table, delay=0.01, max_batch=256)
+    xs = [1 + k / 500 for k in range(1000)]
+
+    async def main():
+        return await asyncio.gather(*(service.lookup(x) for x in xs))
+
+    assert asyncio.run(main()) == [table(x) for x in xs]
+    assert service.lookups == 1000
+    # three full batches and the rest after the delay
+    assert service.batches == 4
+
+
+def test_latency():
+    service = LookupService(LinearInterpolation((1, 2, 3), (10, 20, 30)), delay=0.001)
+
+    async def main():
+        start = time.perf_counter()
+        value = await service.lookup(1.5)
+        return value, time.perf_counter() - start
+
+    value, latency = asyncio.run(main())
+    assert value == 15
+    assert latency < 0.1
+
+
+def test_throughput():
+    table = LinearInterpolation([float(k) for k in range(1000)], [float(k * k) for k in range(1000)])
+    service = LookupService(table, max_batch=1024)
+    xs = [k / 11 for k in range(20000)]
+
+    async def main():
+        start = time.perf_counter()
+        values = await asyncio.gather(*(service.lookup(x) for x in xs))
+        return values, time.perf_counter() - start
+
+    values, seconds = asyncio.run(main())
+    assert all(abs(value - table(x)) <= 1e-9 * value for x, value in zip(xs, values))
+    assert service.batches <= len(xs) // 1024 + 1
+    assert len(xs) / seconds > 1000
+
+
+def test_out_of_range_lookups_fail_alone():
+    service = LookupService(LinearInterpolation((1, 2, 3), (10, 20, 30), extrapolate=False))
+
+    async def main():
+        return await asyncio.gather(service.lookup(1.5), service.lookup(5),
+                                    return_exceptions=True)
+
+    value, error = asyncio.run(main())
+    assert value == 15
+    assert isinstance(error, ValueError)
+
+
+def test_bilinear():
+    table = BilinearInterpolation((1, 2), (1, 3), ((1, 2), (3, 4)))
+    service = LookupService(table)
+
+    async def main():
+        return await asyncio.gather(service.lookup(1.5, 2), service.lookup(2, 3))
+
+    assert asyncio.run(main()) == [table(1.5, 2), 4]
+    assert_raises(TypeError, service.lookup, 1.5)
+    assert_raises(ValueError, LookupService, table, max_batch=0)
+
+
+if __name__ == "__main__":
+    unittest.main()